@@ -0,0 +1,120 @@
+"""Local stand-ins for worldmetrics.org and the datos.gov.co SODA API."""
+
+import json
+import threading
+from contextlib import contextmanager
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+UNITS = ['homes', 'puppies', 'kittens', 'animals', 'pets']
+
+
+def generate_statistics_page(paragraphs, sections, findings=10):
+    """Synthetic page with the same structure the MotherlessHomesSpider selectors expect."""
+    parts = ['<html><head><title>Motherless Homes Statistics</title></head><body>',
+             '<h1>Motherless Homes Statistics</h1>',
+             '<h2>Key Findings</h2><ul class="space-y-4">']
+    for i in range(findings):
+        parts.append(f'<li><p class="text-base sm:text-lg text-gray-800 leading-relaxed">'
+                     f'Approximately {10 + i % 80}% of motherless homes report {i * 37:,} rescued {UNITS[i % 5]}</p></li>')
+    parts.append('</ul>')
+
+    parts.append('<div class="slideshow"><span>Statistic</span>')
+    for i in range(min(findings, 20)):
+        parts.append(f'<p>Statistic {i}: shelters spend ${100 + i * 15:,} per litter every {i + 2} months</p>')
+    parts.append('</div>')
+
+    per_section = max(paragraphs // max(sections, 1), 1)
+    for section in range(sections):
+        parts.append(f'<section><h2>Topic {section} overview</h2>')
+        for i in range(per_section):
+            n = section * per_section + i
+            mention = f'topic {section} overview' if i % 3 == 0 else f'region {n % 97}'
+            parts.append(f'<p>In {mention}, about {n % 100}.{n % 10}% of cases involve {n * 13:,} {UNITS[n % 5]} '
+                         f'and a median stay of {n % 30 + 1} days.</p>')
+        parts.append('</section>')
+    parts.append('</body></html>')
+    return '\n'.join(parts)
+
+
+def soda_columns():
+    return [
+        {'fieldName': 'id_registro', 'name': 'ID', 'dataTypeName': 'number'},
+        {'fieldName': 'municipio', 'name': 'Municipio', 'dataTypeName': 'text'},
+        {'fieldName': 'valor', 'name': 'Valor', 'dataTypeName': 'number'},
+        {'fieldName': 'activo', 'name': 'Activo', 'dataTypeName': 'checkbox'},
+        {'fieldName': 'fecha', 'name': 'Fecha', 'dataTypeName': 'calendar_date'},
+    ]
+
+
+def soda_row(index):
+    return {
+        ':id': f'row-{index:08d}',
+        ':updated_at': (date(2024, 1, 1) + timedelta(minutes=index)).isoformat() + 'T00:00:00.000Z',
+        'id_registro': str(index),
+        'municipio': f'Municipio {index % 1123}',
+        'valor': f'{index * 1.5:.2f}',
+        'activo': index % 2 == 0,
+        'fecha': (date(2020, 1, 1) + timedelta(days=index % 1500)).isoformat() + 'T00:00:00.000',
+    }
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    # Filled in by make_handler
+    total_rows = 0
+    page_cache = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body, content_type):
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split('/') if part]
+
+        if len(parts) == 3 and parts[0] == 'stats':
+            # /stats/<paragraphs>/<sections>/
+            key = (int(parts[1]), int(parts[2]))
+            if key not in self.page_cache:
+                self.page_cache[key] = generate_statistics_page(*key)
+            self.send_body(self.page_cache[key], 'text/html; charset=utf-8')
+        elif len(parts) == 3 and parts[:2] == ['api', 'views']:
+            dataset_id = parts[2].rsplit('.', 1)[0]
+            self.send_body(json.dumps({'id': dataset_id, 'name': f'Benchmark {dataset_id}',
+                                       'columns': soda_columns()}), 'application/json')
+        elif len(parts) == 2 and parts[0] == 'resource':
+            if params.get('$select', '').startswith('count(*)'):
+                self.send_body(json.dumps([{'total': str(self.total_rows)}]), 'application/json')
+                return
+            offset = int(params.get('$offset', 0))
+            limit = int(params.get('$limit', 1000))
+            rows = [soda_row(i) for i in range(offset, min(offset + limit, self.total_rows))]
+            self.send_body(json.dumps(rows), 'application/json')
+        else:
+            self.send_error(404)
+
+
+def make_handler(total_rows=0):
+    return type('BenchmarkHandler', (FixtureHandler,), {'total_rows': total_rows, 'page_cache': {}})
+
+
+@contextmanager
+def serve(handler):
+    """Run ``handler`` on an ephemeral local port; yields the base URL."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Offline benchmarks for both spiders against local fixture servers.
+
+Each case runs in its own process so peak RSS is per case. Results are saved
+to benchmarks/results/ and compared with the previous run.
+
+    python benchmarks/run.py                 # all cases
+    python benchmarks/run.py --only parse    # only cases whose name contains "parse"
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import queue as queue_module
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.request import urlopen
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_FOLDER = os.path.join(ROOT, 'benchmarks', 'results')
+sys.path[:0] = [os.path.join(ROOT, 'benchmarks'), os.path.join(ROOT, 'scrapy_project'),
+                os.path.join(ROOT, 'selenium_project')]
+
+from fixtures import make_handler, serve  # noqa: E402
+
+PARSE_CASES = [(200, 10), (2000, 100), (10000, 1000)]
+API_CASES = [(10000, 1), (100000, 10), (200000, 40)]
+REPEAT = 3
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def bench_parse(paragraphs, sections):
+    from scrapy.http import HtmlResponse
+    from motherless_spider import MotherlessHomesSpider
+
+    with serve(make_handler()) as base_url:
+        url = f'{base_url}/stats/{paragraphs}/{sections}/'
+        body = urlopen(url).read()
+
+    spider = MotherlessHomesSpider()
+    best = None
+    items = 0
+    for _ in range(REPEAT):
+        response = HtmlResponse(url=url, body=body, encoding='utf-8')
+        started = time.perf_counter()
+        items = sum(1 for _ in spider.parse(response))
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return {'items': items, 'seconds': best, 'items_per_second': items / best, 'bytes': len(body)}
+
+
+def bench_api(rows, pages):
+    from selenium_spider import ColombiaDataPortalSpider
+
+    with serve(make_handler(total_rows=rows)) as base_url, tempfile.TemporaryDirectory() as folder:
+        spider = ColombiaDataPortalSpider('bench-dataset')
+        spider.base_url = base_url
+        spider.api_url = f'{base_url}/resource/bench-dataset.json'
+        spider.datasets_folder = folder
+        spider.api_page_size = -(-rows // pages)
+        spider.web_fallback = False
+        started = time.perf_counter()
+        if not spider.download_dataset_from_api('bench-dataset'):
+            raise RuntimeError('La descarga desde la API de prueba falló')
+        elapsed = time.perf_counter() - started
+        written = sum(os.path.getsize(path) for path in spider.downloaded_files)
+    return {'items': spider.rows_downloaded, 'seconds': elapsed,
+            'items_per_second': spider.rows_downloaded / elapsed, 'bytes': written}
+
+
+def run_case(target, args, queue):
+    try:
+        result = target(*args)
+        result['peak_rss_mb'] = peak_rss_mb()
+        queue.put(result)
+    except Exception as e:
+        queue.put({'error': f'{type(e).__name__}: {e}'})
+
+
+def wait_result(process, queue, timeout):
+    """The case's result, or an error if its process died or ran past ``timeout`` seconds."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return queue.get(timeout=1)
+        except queue_module.Empty:
+            pass
+        if not process.is_alive():
+            # The result may have been queued right before the process exited
+            try:
+                return queue.get(timeout=1)
+            except queue_module.Empty:
+                return {'error': f'el proceso terminó sin resultado (exitcode {process.exitcode})'}
+        if time.monotonic() > deadline:
+            process.terminate()
+            return {'error': f'sin resultado tras {timeout}s'}
+
+
+def cases():
+    for paragraphs, sections in PARSE_CASES:
+        yield f'parse[{paragraphs}p-{sections}s]', bench_parse, (paragraphs, sections)
+    for rows, pages in API_CASES:
+        yield f'api[{rows}r-{pages}pg]', bench_api, (rows, pages)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def previous_results():
+    files = sorted(glob.glob(os.path.join(RESULTS_FOLDER, '*.json')))
+    if not files:
+        return {}
+    with open(files[-1], encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', help='Run only the cases whose name contains this text')
+    parser.add_argument('--timeout', type=float, default=600, help='Seconds before a case is reported as failed')
+    args = parser.parse_args()
+
+    previous = previous_results()
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for name, target, case_args in cases():
+        if args.only and args.only not in name:
+            continue
+        queue = context.Queue()
+        process = context.Process(target=run_case, args=(target, case_args, queue))
+        process.start()
+        result = wait_result(process, queue, args.timeout)
+        process.join()
+        results[name] = result
+
+        if 'error' in result:
+            print(f'{name:28} ERROR {result["error"]}')
+            continue
+        line = (f'{name:28} {result["items_per_second"]:>12,.0f} items/s '
+                f'{result["seconds"]:>8.3f}s {result["peak_rss_mb"]:>8.1f} MB')
+        before = previous.get(name)
+        if before and 'items_per_second' in before:
+            change = result['items_per_second'] / before['items_per_second'] - 1
+            line += f'  ({change:+.1%} vs anterior)'
+        print(line)
+
+    os.makedirs(RESULTS_FOLDER, exist_ok=True)
+    revision = git_revision()
+    path = os.path.join(RESULTS_FOLDER, f'{time.strftime("%Y%m%dT%H%M%S")}-{revision}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'revision': revision, 'python': sys.version.split()[0], 'results': results}, f, indent=2)
+    print(f'\nResultados guardados en {os.path.relpath(path, ROOT)}')
+
+
+if __name__ == '__main__':
+    main()
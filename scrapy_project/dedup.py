@@ -0,0 +1,106 @@
+import dbm
+import hashlib
+import math
+import os
+import re
+import struct
+import unicodedata
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """Case, Unicode form and whitespace differences do not make a new statistic."""
+    text = unicodedata.normalize('NFKC', text).casefold()
+    return WHITESPACE.sub(' ', text).strip(' .;:')
+
+
+def content_hash(*parts):
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.digest()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 16-byte digests, persisted as one file.
+
+    Positions come from double hashing the two halves of the digest, so no
+    extra hashing is needed per lookup.
+    """
+
+    HEADER = struct.Struct('<QI')
+
+    def __init__(self, path, capacity=1000000, error_rate=0.001):
+        self.path = path
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                self.size, self.hashes = self.HEADER.unpack(f.read(self.HEADER.size))
+                self.bits = bytearray(f.read())
+        else:
+            self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+            self.hashes = max(1, round(self.size / capacity * math.log(2)))
+            self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, digest):
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:16], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, digest):
+        for position in self.positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def clear(self):
+        self.bits = bytearray(len(self.bits))
+
+    def __contains__(self, digest):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(digest))
+
+    def save(self):
+        temporary_path = self.path + '.tmp'
+        with open(temporary_path, 'wb') as f:
+            f.write(self.HEADER.pack(self.size, self.hashes))
+            f.write(self.bits)
+        os.replace(temporary_path, self.path)
+
+
+class ContentIndex:
+    """Persistent set of content hashes: a Bloom filter in front of an exact dbm store.
+
+    New hashes (the common case) are answered by the filter without touching
+    the store; filter hits are confirmed in the store, so there are no false
+    positives. The store keeps when each hash was first seen.
+
+    The filter is only saved by ``close``. A ``.open`` marker exists while
+    the index is in use; if it is still there on the next open, the previous
+    run did not close and the filter is rebuilt from the store, which may
+    hold hashes the saved filter never got.
+    """
+
+    def __init__(self, path, capacity=1000000, error_rate=0.001):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.marker_path = path + '.open'
+        self.db = dbm.open(path, 'c')
+        self.bloom = BloomFilter(path + '.bloom', capacity, error_rate)
+        if os.path.exists(self.marker_path):
+            self.bloom.clear()
+            for digest in self.db.keys():
+                self.bloom.add(digest)
+        open(self.marker_path, 'w').close()
+
+    def first_seen(self, digest):
+        if digest not in self.bloom:
+            return None
+        value = self.db.get(digest)
+        return value.decode('utf-8') if value is not None else None
+
+    def add(self, digest, seen_at):
+        self.bloom.add(digest)
+        self.db[digest] = seen_at.encode('utf-8')
+
+    def close(self):
+        self.bloom.save()
+        self.db.close()
+        os.remove(self.marker_path)
@@ -0,0 +1,98 @@
+import re
+from collections import namedtuple
+
+Statistic = namedtuple('Statistic', ['value', 'unit', 'number', 'is_statistic'])
+
+COUNT_WORDS = ('homes', 'puppies', 'kittens', 'animals', 'pets')
+
+# One alternation covers every token the old extract_value/extract_unit and the
+# content filter in parse looked for, so each string is scanned exactly once.
+# A thousands group is only taken when its digits do not themselves start a
+# percentage, which keeps the leftmost-match results of the original searches.
+TOKEN_PATTERN = re.compile(
+    r'(?P<pct>\d+(?:\.\d+)?)(?P<gap>\s*)%'
+    r'|(?P<usdpct>\$)(?=\d+(?:\.\d+)?\s*%)'
+    r'|\$(?P<usd>\d+(?:,(?!\d+(?:\.\d+)?\s*%)\d+)?)'
+    r'|(?P<num>\d+(?:,(?!\d+(?:\.\d+)?\s*%)\d+)?)(?:\s*(?P<noun>homes?|puppies?|kittens?|animals?|pets?))?'
+    r'|(?P<time>months|years|days)'
+    r'|(?P<count>(?i:' + '|'.join(COUNT_WORDS) + r'))'
+    r'|(?P<sym>[%$])'
+)
+
+
+class StatisticTokenizer:
+    """Single-pass extraction of value, unit and typed number from a statistic sentence."""
+
+    def __init__(self, pattern=TOKEN_PATTERN):
+        self.pattern = pattern
+
+    def extract(self, text):
+        percentage = dollars = number = None
+        has_percent = has_dollar = has_time = has_count = False
+        is_statistic = False
+
+        for match in self.pattern.finditer(text):
+            kind = match.lastgroup
+            if kind == 'gap':
+                # pct always closes with the optional gap group
+                has_percent = True
+                if percentage is None:
+                    percentage = match.group('pct')
+                if not match.group('gap'):
+                    is_statistic = True
+            elif kind == 'usdpct':
+                has_dollar = is_statistic = True
+            elif kind == 'usd':
+                has_dollar = is_statistic = True
+                if dollars is None:
+                    dollars = match.group('usd')
+            elif kind in ('num', 'noun'):
+                if number is None:
+                    number = match.group('num')
+                noun = match.group('noun')
+                if noun:
+                    is_statistic = True
+                    if noun in COUNT_WORDS:
+                        has_count = True
+            elif kind == 'time':
+                has_time = True
+            elif kind == 'count':
+                has_count = True
+            elif match.group('sym') == '%':
+                has_percent = True
+            else:
+                has_dollar = True
+
+        if percentage is not None:
+            value = percentage
+        elif dollars is not None:
+            value = dollars.replace(',', '')
+        elif number is not None:
+            value = number.replace(',', '')
+        else:
+            value = 'N/A'
+
+        if has_percent:
+            unit = 'percentage'
+        elif has_dollar:
+            unit = 'dollars'
+        elif has_time:
+            unit = 'time'
+        elif has_count:
+            unit = 'count'
+        else:
+            unit = 'ratio'
+
+        return Statistic(value, unit, self.to_number(value), is_statistic)
+
+    def extract_many(self, texts):
+        extract = self.extract
+        return [extract(text) for text in texts]
+
+    @staticmethod
+    def to_number(value):
+        if value == 'N/A':
+            return None
+        if '.' in value:
+            return float(value)
+        return int(value)
@@ -0,0 +1,114 @@
+import os
+import sqlite3
+import time
+from urllib.parse import urlsplit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    claimed_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS urls_status ON urls (status, host);
+CREATE TABLE IF NOT EXISTS hosts (
+    host TEXT PRIMARY KEY,
+    next_allowed_at REAL NOT NULL
+);
+"""
+
+
+class Frontier:
+    """Crawl frontier shared by several worker processes through one SQLite file.
+
+    The ``urls`` table is both the queue and the seen set: a URL is added at
+    most once, whoever discovers it. Workers claim pending URLs in short
+    transactions; each claim takes at most one URL per host and pushes the
+    host's ``next_allowed_at`` forward by ``delay``, so politeness holds
+    across all workers together. Claims not completed within ``lease``
+    seconds (a worker died) go back to pending.
+    """
+
+    def __init__(self, path, delay=0.25, lease=300, max_attempts=3):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.delay = delay
+        self.lease = lease
+        self.max_attempts = max_attempts
+        # isolation_level=None: transactions are opened explicitly below
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+
+    def add(self, urls):
+        """Queue the URLs not seen before; returns how many were new."""
+        rows = [(url, urlsplit(url).netloc) for url in urls]
+        if not rows:
+            return 0
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            before = self.connection.total_changes
+            self.connection.executemany('INSERT OR IGNORE INTO urls (url, host) VALUES (?, ?)', rows)
+            added = self.connection.total_changes - before
+            self.connection.execute('COMMIT')
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        return added
+
+    def claim(self, worker, limit):
+        """Claim up to ``limit`` pending URLs whose host may be fetched now."""
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            # Read once the lock is held: waiting for it can take longer than the delay
+            now = time.time()
+            self.connection.execute(
+                "UPDATE urls SET status = 'pending', worker = NULL "
+                "WHERE status = 'claimed' AND claimed_at < ?", (now - self.lease,))
+            candidates = self.connection.execute(
+                "SELECT u.url, u.host FROM urls u LEFT JOIN hosts h ON h.host = u.host "
+                "WHERE u.status = 'pending' AND coalesce(h.next_allowed_at, 0) <= ? "
+                "ORDER BY u.rowid LIMIT ?", (now, limit * 20)).fetchall()
+            claimed = []
+            hosts = set()
+            for url, host in candidates:
+                if host in hosts:
+                    continue
+                hosts.add(host)
+                claimed.append(url)
+                if len(claimed) >= limit:
+                    break
+            self.connection.executemany(
+                "UPDATE urls SET status = 'claimed', worker = ?, claimed_at = ?, attempts = attempts + 1 "
+                "WHERE url = ?", [(worker, now, url) for url in claimed])
+            self.connection.executemany(
+                "INSERT INTO hosts (host, next_allowed_at) VALUES (?, ?) "
+                "ON CONFLICT(host) DO UPDATE SET next_allowed_at = excluded.next_allowed_at",
+                [(host, now + self.delay) for host in hosts])
+            self.connection.execute('COMMIT')
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        return claimed
+
+    def complete(self, url, ok=True):
+        if ok:
+            status = 'done'
+        else:
+            attempts = self.connection.execute('SELECT attempts FROM urls WHERE url = ?', (url,)).fetchone()
+            status = 'failed' if attempts and attempts[0] >= self.max_attempts else 'pending'
+        self.connection.execute("UPDATE urls SET status = ?, worker = NULL WHERE url = ?", (status, url))
+
+    def counts(self):
+        return dict(self.connection.execute('SELECT status, count(*) FROM urls GROUP BY status').fetchall())
+
+    def has_work(self):
+        """True while any URL is pending or being fetched by some worker."""
+        return self.connection.execute(
+            "SELECT 1 FROM urls WHERE status IN ('pending', 'claimed') LIMIT 1").fetchone() is not None
+
+    def close(self):
+        self.connection.close()
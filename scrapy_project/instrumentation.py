@@ -0,0 +1,101 @@
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+# Upper bounds (seconds) of the latency histogram buckets kept in the stats
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+HISTOGRAM_KEY = re.compile(r'^timing/(?P<stage>[^/]+)/(?P<field>count|seconds|le_(?P<bound>[\d.]+|inf))$')
+
+
+def observe(stats, stage, seconds, spider=None):
+    """Record one duration for ``stage`` as histogram counters in the Scrapy stats."""
+    if stats is None:
+        return
+    stats.inc_value(f'timing/{stage}/count', spider=spider)
+    stats.inc_value(f'timing/{stage}/seconds', seconds, spider=spider)
+    for bound in BUCKETS:
+        if seconds <= bound:
+            stats.inc_value(f'timing/{stage}/le_{bound}', spider=spider)
+    stats.inc_value(f'timing/{stage}/le_inf', spider=spider)
+
+
+@contextmanager
+def stage_timer(stats, stage, spider=None):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stats, stage, time.perf_counter() - started, spider)
+
+
+def prometheus_name(key, prefix):
+    return prefix + '_' + re.sub(r'[^a-zA-Z0-9_]', '_', key).strip('_').lower()
+
+
+def to_prometheus(stats, prefix='scrapy'):
+    """Render a Scrapy stats dict in Prometheus text exposition format."""
+    lines = []
+    histograms = {}
+    for key, value in sorted(stats.items()):
+        match = HISTOGRAM_KEY.match(key)
+        if match:
+            histograms.setdefault(match.group('stage'), {})[match.group('field')] = value
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            name = prometheus_name(key, prefix)
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+
+    if histograms:
+        name = f'{prefix}_stage_duration_seconds'
+        lines.append(f'# TYPE {name} histogram')
+        for stage, fields in sorted(histograms.items()):
+            for bound in BUCKETS:
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {fields.get(f"le_{bound}", 0)}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {fields.get("le_inf", 0)}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {fields.get("seconds", 0)}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {fields.get("count", 0)}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsExporter:
+    """Adds download latency to the stage histograms and exports all stats when the spider closes.
+
+    Writes ``<METRICS_EXPORT_PATH>.json`` and ``<METRICS_EXPORT_PATH>.prom``.
+    """
+
+    def __init__(self, crawler, path):
+        self.crawler = crawler
+        self.path = path
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get('METRICS_EXPORT_PATH')
+        if not path:
+            raise NotConfigured
+        extension = cls(crawler, path)
+        crawler.signals.connect(extension.response_received, signal=signals.response_received)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def response_received(self, response, request, spider):
+        latency = request.meta.get('download_latency')
+        if latency is not None:
+            observe(self.crawler.stats, 'download', latency, spider)
+
+    def spider_closed(self, spider, reason):
+        stats = self.crawler.stats.get_stats(spider)
+        path = self.path % {'name': spider.name}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path + '.json', 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=2, default=str)
+        with open(path + '.prom', 'w', encoding='utf-8') as f:
+            f.write(to_prometheus(stats))
+        spider.logger.info(f'Métricas exportadas en {path}.json y {path}.prom')
@@ -0,0 +1,129 @@
+import dbm
+import hashlib
+import os
+from collections import defaultdict, deque
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.project import data_path
+
+
+class ErrorRateThrottleMiddleware:
+    """Backs off a download slot when its recent error rate gets too high.
+
+    AutoThrottle tunes the delay from latency but never reacts to 429/5xx or
+    connection errors. This keeps a sliding window of outcomes per slot and,
+    above the threshold, multiplies the slot delay and halves its concurrency;
+    once the window is healthy again concurrency grows back one step at a time.
+    """
+
+    ERROR_STATUSES = {429, 500, 502, 503, 504, 520, 522, 524}
+
+    def __init__(self, crawler, window, threshold, backoff, max_delay):
+        self.crawler = crawler
+        self.threshold = threshold
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.outcomes = defaultdict(lambda: deque(maxlen=window))
+        self.max_concurrency = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('ERROR_THROTTLE_ENABLED'):
+            raise NotConfigured
+        return cls(
+            crawler,
+            window=settings.getint('ERROR_THROTTLE_WINDOW'),
+            threshold=settings.getfloat('ERROR_THROTTLE_THRESHOLD'),
+            backoff=settings.getfloat('ERROR_THROTTLE_BACKOFF'),
+            max_delay=settings.getfloat('AUTOTHROTTLE_MAX_DELAY'),
+        )
+
+    def process_response(self, request, response, spider):
+        self.record(request, spider, response.status in self.ERROR_STATUSES)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        self.record(request, spider, True)
+
+    def record(self, request, spider, failed):
+        key = request.meta.get('download_slot')
+        slot = self.crawler.engine.downloader.slots.get(key)
+        if slot is None:
+            return
+
+        outcomes = self.outcomes[key]
+        outcomes.append(failed)
+        self.max_concurrency.setdefault(key, slot.concurrency)
+        error_rate = sum(outcomes) / len(outcomes)
+
+        if failed and error_rate >= self.threshold:
+            slot.delay = min(max(slot.delay, 0.5) * self.backoff, self.max_delay)
+            slot.concurrency = max(1, slot.concurrency // 2)
+            self.crawler.stats.inc_value('error_throttle/backoff', spider=spider)
+            spider.logger.debug(
+                f'Tasa de error {error_rate:.0%} en {key}: delay={slot.delay:.2f}s, concurrencia={slot.concurrency}'
+            )
+        elif not failed and error_rate < self.threshold / 2:
+            slot.concurrency = min(slot.concurrency + 1, self.max_concurrency[key])
+
+
+class ContentFingerprintMiddleware:
+    """Flags responses whose body is identical to the last crawl of the same URL.
+
+    Runs after HttpCacheMiddleware, so revalidated (304) and fresh responses
+    are both hashed. Unchanged pages get the ``unchanged`` flag and the spider
+    skips re-extracting them.
+
+    New fingerprints are only saved when the spider closes, after the item
+    pipelines have flushed their buffers, and not for pages whose callback
+    or items failed: a page is never marked unchanged before its statistics
+    were actually written.
+    """
+
+    def __init__(self, crawler, path):
+        self.crawler = crawler
+        self.path = path
+        self.db = None
+        self.pending = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('CONTENT_FINGERPRINT_ENABLED'):
+            raise NotConfigured
+        middleware = cls(crawler, data_path(settings.get('CONTENT_FINGERPRINT_DB')))
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(middleware.page_failed, signal=signals.spider_error)
+        crawler.signals.connect(middleware.page_failed, signal=signals.item_error)
+        return middleware
+
+    def spider_opened(self, spider):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.db = dbm.open(self.path, 'c')
+
+    def spider_closed(self, spider):
+        # spider_closed is sent after the pipelines' close_spider, so every
+        # item of these pages has been exported and stored by now
+        for key, digest in self.pending.items():
+            self.db[key] = digest
+        self.pending.clear()
+        self.db.close()
+
+    def page_failed(self, failure, response, spider, item=None):
+        if response is not None:
+            self.pending.pop(response.request.url.encode('utf-8'), None)
+
+    def process_response(self, request, response, spider):
+        if response.status != 200:
+            return response
+        key = request.url.encode('utf-8')
+        digest = hashlib.sha1(response.body).hexdigest().encode('ascii')
+        if self.db.get(key) == digest:
+            self.crawler.stats.inc_value('content_fingerprint/unchanged', spider=spider)
+            return response.replace(flags=response.flags + ['unchanged'])
+        self.pending[key] = digest
+        self.crawler.stats.inc_value('content_fingerprint/changed', spider=spider)
+        return response
@@ -1,115 +1,191 @@
 import scrapy
-import csv
-import re
+from collections import Counter
+from scrapy import signals
 from scrapy.crawler import CrawlerProcess
-from scrapy.utils.project import get_project_settings
+from scrapy.exceptions import DontCloseSpider
+from scrapy.linkextractors import LinkExtractor
+from scrapy.spiders import SitemapSpider
+from scrapy.utils.project import data_path, get_project_settings
+from twisted.internet.task import LoopingCall
+
+from extraction import StatisticTokenizer
+from frontier import Frontier
+from instrumentation import stage_timer
+from page_extraction import StatisticsPageExtractor
+from section_matcher import SectionMatcher
 
 class MotherlessHomesSpider(scrapy.Spider):
     name = 'motherless_homes'
     start_urls = ['https://worldmetrics.org/motherless-homes-statistics/']
+    tokenizer = StatisticTokenizer()
+    extractor = StatisticsPageExtractor()
     
     def parse(self, response):
-        key_findings = response.css('ul.space-y-4 li p.text-base.sm\\:text-lg.text-gray-800.leading-relaxed::text').getall()
-        slideshow_stats = response.css('div:contains("Statistic") p::text').getall()
-        section_titles = response.css('h2, h3::text').getall()
-        content_paragraphs = response.css('p::text').getall()
+        if 'unchanged' in response.flags:
+            self.logger.debug(f'Sin cambios desde la última ejecución: {response.url}')
+            return
+        
+        with self.timed('select'):
+            key_findings, slideshow_stats, section_titles, content_paragraphs = self.extractor.extract(response.selector.root)
+        with self.timed('tokenize'):
+            content_statistics = self.tokenizer.extract_many(content_paragraphs)
         
-        csv_data = []
+        # Items are yielded as soon as they are built; the export pipeline writes them
+        category_counts = Counter()
+        
+        def counted(item):
+            category_counts[item['category']] += 1
+            return item
         
         for i, finding in enumerate(key_findings, 1):
             if finding.strip():
-                csv_data.append({
-                    'category': 'Key Findings',
-                    'statistic_number': i,
-                    'description': finding.strip(),
-                    'value': self.extract_value(finding),
-                    'unit': self.extract_unit(finding)
-                })
+                yield counted(self.build_item(response, 'Key Findings', i, finding, self.tokenizer.extract(finding)))
         
         for i, stat in enumerate(slideshow_stats, 1):
             if stat.strip() and len(stat.strip()) > 10:
-                csv_data.append({
-                    'category': 'Slideshow Statistics',
-                    'statistic_number': i,
-                    'description': stat.strip(),
-                    'value': self.extract_value(stat),
-                    'unit': self.extract_unit(stat)
-                })
+                yield counted(self.build_item(response, 'Slideshow Statistics', i, stat, self.tokenizer.extract(stat)))
         
+        # One pass of all paragraphs through an index of every title, instead of
+        # rescanning the paragraphs for each title
+        with self.timed('section_match'):
+            section_matches = SectionMatcher(section_titles).match(content_paragraphs)
         for section_title in section_titles:
-            if section_title.strip():
-                try:
-                    section_content = response.css('p::text').getall()
-                    for content in section_content:
-                        if content.strip() and section_title.strip().lower() in content.lower():
-                            if len(content.strip()) > 10:
-                                csv_data.append({
-                                    'category': section_title.strip(),
-                                    'statistic_number': len([x for x in csv_data if x['category'] == section_title.strip()]) + 1,
-                                    'description': content.strip(),
-                                    'value': self.extract_value(content),
-                                    'unit': self.extract_unit(content)
-                                })
-                except Exception as e:
-                    self.logger.warning(f"Error procesando sección {section_title}: {e}")
-                    continue
-        
-        for i, paragraph in enumerate(content_paragraphs, 1):
-            if paragraph.strip() and len(paragraph.strip()) > 20:
-                if re.search(r'\d+%|\$\d+|\d+(?:,\d+)?\s*(?:homes?|puppies?|kittens?|animals?|pets?)', paragraph):
-                    csv_data.append({
-                        'category': 'Content Statistics',
-                        'statistic_number': i,
-                        'description': paragraph.strip(),
-                        'value': self.extract_value(paragraph),
-                        'unit': self.extract_unit(paragraph)
-                    })
+            category = section_title.strip()
+            if not category:
+                continue
+            for index in section_matches[category.lower()]:
+                content = content_paragraphs[index]
+                if len(content.strip()) > 10:
+                    yield counted(self.build_item(response, category, category_counts[category] + 1, content, content_statistics[index]))
         
-        self.save_to_csv(csv_data, 'motherless_homes_statistics.csv')
-        
-        for item in csv_data:
-            yield item
+        for i, (paragraph, statistic) in enumerate(zip(content_paragraphs, content_statistics), 1):
+            if paragraph.strip() and len(paragraph.strip()) > 20 and statistic.is_statistic:
+                yield counted(self.build_item(response, 'Content Statistics', i, paragraph, statistic))
     
-    def extract_value(self, text):
-        percentage_match = re.search(r'(\d+(?:\.\d+)?)\s*%', text)
-        if percentage_match:
-            return percentage_match.group(1)
-        
-        dollar_match = re.search(r'\$(\d+(?:,\d+)?)', text)
-        if dollar_match:
-            return dollar_match.group(1).replace(',', '')
-        
-        number_match = re.search(r'(\d+(?:,\d+)?)', text)
-        if number_match:
-            return number_match.group(1).replace(',', '')
-        
-        return "N/A"
-    
-    def extract_unit(self, text):
-        if '%' in text:
-            return 'percentage'
-        elif '$' in text:
-            return 'dollars'
-        elif 'months' in text or 'years' in text or 'days' in text:
-            return 'time'
-        elif any(word in text.lower() for word in ['homes', 'puppies', 'kittens', 'animals', 'pets']):
-            return 'count'
-        else:
-            return 'ratio'
-    
-    def save_to_csv(self, data, filename):
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['category', 'statistic_number', 'description', 'value', 'unit']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for row in data:
-                writer.writerow(row)
-        
-        self.logger.info(f'Datos guardados en {filename}')
+    def timed(self, stage):
+        # Spiders built outside a crawler (benchmarks) have no stats to record into
+        crawler = getattr(self, 'crawler', None)
+        return stage_timer(crawler.stats if crawler else None, stage, self)
+    
+    def build_item(self, response, category, statistic_number, text, statistic):
+        return {
+            'source_url': response.url,
+            'category': category,
+            'statistic_number': statistic_number,
+            'description': text.strip(),
+            'value': statistic.value,
+            'unit': statistic.unit
+        }
+
+class WorldMetricsStatisticsSpider(MotherlessHomesSpider, SitemapSpider):
+    """Discovers every statistics page through the sitemaps and internal links."""
+    name = 'worldmetrics_statistics'
+    allowed_domains = ['worldmetrics.org']
+    sitemap_urls = ['https://worldmetrics.org/robots.txt']
+    sitemap_rules = [(r'-statistics/?$', 'parse')]
+    link_extractor = LinkExtractor(allow=r'-statistics/?$', allow_domains=allowed_domains)
+    
+    def start_requests(self):
+        yield from super().start_requests()
+        # The seed page is crawled too, so link discovery works even without a sitemap
+        for url in self.start_urls:
+            yield scrapy.Request(url, callback=self.parse)
+    
+    def parse(self, response):
+        yield from super().parse(response)
+        for link in self.link_extractor.extract_links(response):
+            yield response.follow(link, callback=self.parse)
+
+class ShardedStatisticsSpider(MotherlessHomesSpider):
+    """Worker of a sharded crawl (see shard.py).
+    
+    Requests come from a Frontier shared with the other workers and
+    discovered links go back to it; the spider stays open while any worker
+    still has URLs pending or in flight.
+    """
+    name = 'sharded_statistics'
+    allowed_domains = WorldMetricsStatisticsSpider.allowed_domains
+    link_extractor = WorldMetricsStatisticsSpider.link_extractor
+    # Set by shard.py for each worker process
+    frontier_path = None
+    worker_id = '0'
+    
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        settings = crawler.settings
+        spider.frontier = Frontier(spider.frontier_path or data_path(settings.get('FRONTIER_PATH')),
+                                   delay=settings.getfloat('FRONTIER_HOST_DELAY'))
+        spider.max_in_flight = settings.getint('CONCURRENT_REQUESTS')
+        spider.in_flight = 0
+        spider.poller = None
+        crawler.signals.connect(spider.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(spider.spider_idle, signal=signals.spider_idle)
+        crawler.signals.connect(spider.spider_closed, signal=signals.spider_closed)
+        return spider
+    
+    def start_requests(self):
+        # Every request is claimed through the frontier; start_urls only seed
+        # a new one (shard.py seeds it before starting the workers)
+        if not self.frontier.counts():
+            self.frontier.add(self.start_urls)
+        return []
+    
+    async def start(self):
+        # Scrapy >= 2.13 calls start() and no longer falls back to start_requests()
+        for request in self.start_requests():
+            yield request
+    
+    def spider_opened(self, spider):
+        # Created here, not in from_crawler: LoopingCall imports the reactor,
+        # which must not happen before Scrapy installs its own
+        self.poller = LoopingCall(self.schedule_claimed)
+        self.poller.start(self.settings.getfloat('FRONTIER_POLL_INTERVAL'), now=True)
+    
+    def spider_idle(self, spider):
+        if self.frontier.has_work():
+            raise DontCloseSpider
+    
+    def spider_closed(self, spider):
+        if self.poller and self.poller.running:
+            self.poller.stop()
+        self.frontier.close()
+    
+    def schedule_claimed(self):
+        capacity = self.max_in_flight - self.in_flight
+        if capacity <= 0:
+            return
+        for url in self.frontier.claim(self.worker_id, capacity):
+            self.in_flight += 1
+            # The frontier is the seen set, so the scheduler's own filter is skipped
+            self.crawler.engine.crawl(scrapy.Request(url, callback=self.parse, errback=self.failed,
+                                                     dont_filter=True, meta={'frontier_url': url}))
+    
+    def parse(self, response):
+        ok = False
+        try:
+            yield from super().parse(response)
+            self.frontier.add([link.url for link in self.link_extractor.extract_links(response)])
+            ok = True
+        finally:
+            self.finished(response.meta['frontier_url'], ok)
+    
+    def failed(self, failure):
+        self.finished(failure.request.meta['frontier_url'], False)
+    
+    def finished(self, url, ok):
+        self.in_flight -= 1
+        self.frontier.complete(url, ok)
 
-def run_spider():
-    process = CrawlerProcess(get_project_settings())
-    process.crawl(MotherlessHomesSpider)
+def run_spider(discover=False, offline=False):
+    settings = get_project_settings()
+    if offline:
+        # Replay everything from the HTTP cache without touching the network
+        settings.set('HTTPCACHE_POLICY', 'scrapy.extensions.httpcache.DummyPolicy')
+        settings.set('HTTPCACHE_IGNORE_MISSING', True)
+        settings.set('CONTENT_FINGERPRINT_ENABLED', False)
+    process = CrawlerProcess(settings)
+    process.crawl(WorldMetricsStatisticsSpider if discover else MotherlessHomesSpider)
     process.start()
 
 if __name__ == '__main__':
@@ -0,0 +1,40 @@
+from collections import namedtuple
+
+from cssselect import HTMLTranslator
+from lxml import etree
+
+PageSections = namedtuple('PageSections', ['key_findings', 'slideshow_stats', 'section_titles', 'content_paragraphs'])
+
+
+def compile_text_query(*css_selectors):
+    """Compile the text nodes of elements matching any of ``css_selectors`` into one XPath.
+
+    smart_strings=False makes lxml return plain str instead of strings that
+    keep a reference to their parent element.
+    """
+    translator = HTMLTranslator()
+    paths = ' | '.join(translator.css_to_xpath(css, prefix='descendant::') for css in css_selectors)
+    return etree.XPath(f'({paths})/text()', smart_strings=False)
+
+
+class StatisticsPageExtractor:
+    """Pulls all the text the spider needs out of a statistics page.
+
+    The selectors are translated and compiled once, when the module is
+    imported, and evaluated by libxml2 directly on the parsed tree. Going
+    through ``response.css(...).getall()`` re-wraps every text node in a
+    Selector object, which was most of the cost of parsing a large page.
+    """
+
+    key_findings = compile_text_query('ul.space-y-4 li p.text-base.sm\\:text-lg.text-gray-800.leading-relaxed')
+    slideshow_stats = compile_text_query('div:contains("Statistic") p')
+    section_titles = compile_text_query('h2', 'h3')
+    content_paragraphs = compile_text_query('p')
+
+    def extract(self, root):
+        return PageSections(
+            self.key_findings(root),
+            self.slideshow_stats(root),
+            self.section_titles(root),
+            self.content_paragraphs(root),
+        )
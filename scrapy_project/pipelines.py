@@ -0,0 +1,277 @@
+import bz2
+import csv
+import gzip
+import json
+import logging
+import lzma
+import os
+import time
+
+from scrapy import signals
+from scrapy.exceptions import DropItem, NotConfigured
+from scrapy.logformatter import LogFormatter
+from scrapy.utils.project import data_path
+
+from dedup import ContentIndex, content_hash, normalize_text
+from extraction import StatisticTokenizer
+from store import StatisticsStore
+
+
+class CsvSink:
+    extension = '.csv'
+
+    def __init__(self, file, fieldnames):
+        self.writer = csv.DictWriter(file, fieldnames=fieldnames, extrasaction='ignore')
+        self.writer.writeheader()
+
+    def write(self, items):
+        self.writer.writerows(items)
+
+
+class JsonLinesSink:
+    extension = '.jsonl'
+
+    def __init__(self, file, fieldnames):
+        self.file = file
+
+    def write(self, items):
+        self.file.write(''.join(json.dumps(item, ensure_ascii=False) + '\n' for item in items))
+
+
+SINKS = {
+    'csv': CsvSink,
+    'jsonl': JsonLinesSink,
+}
+
+COMPRESSIONS = {
+    None: (open, ''),
+    'gzip': (gzip.open, '.gz'),
+    'bz2': (bz2.open, '.bz2'),
+    'xz': (lzma.open, '.xz'),
+}
+
+
+class DuplicateItem(DropItem):
+    """An item dropped by DeduplicationPipeline; expected, so logged at DEBUG (see DedupLogFormatter)."""
+
+
+class DedupLogFormatter(LogFormatter):
+    def dropped(self, item, exception, response, spider):
+        entry = super().dropped(item, exception, response, spider)
+        if isinstance(exception, DuplicateItem):
+            entry['level'] = logging.DEBUG
+        return entry
+
+
+class DeduplicationPipeline:
+    """Drops statistics repeated on the same page and skips or tags ones seen in earlier runs.
+
+    The same paragraph is often emitted as a key finding, under a section
+    title and as a content statistic; only the first is kept. The key is the
+    page URL plus the normalized description. With DEDUP_MODE = 'tag', items
+    already stored by a previous run are kept with a ``first_seen`` field;
+    with 'skip' they are dropped. With an empty DEDUP_INDEX only repeats
+    within the run are dropped.
+
+    New hashes are only added to the index on spider_closed, which is sent
+    after the export and store pipelines have flushed: an interrupted run
+    never marks as stored statistics that were not written.
+    """
+
+    MODES = ('tag', 'skip')
+
+    def __init__(self, stats, path, mode, capacity, error_rate):
+        if mode not in self.MODES:
+            raise ValueError(f'Modo de deduplicación no soportado: {mode}')
+        self.stats = stats
+        self.path = path
+        self.mode = mode
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.index = None
+        self.run_started = None
+        self.seen_this_run = set()
+        self.new_digests = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('DEDUP_ENABLED'):
+            raise NotConfigured
+        index = settings.get('DEDUP_INDEX')
+        pipeline = cls(
+            stats=crawler.stats,
+            path=data_path(index) if index else None,
+            mode=settings.get('DEDUP_MODE'),
+            capacity=settings.getint('DEDUP_BLOOM_CAPACITY'),
+            error_rate=settings.getfloat('DEDUP_BLOOM_ERROR_RATE'),
+        )
+        crawler.signals.connect(pipeline.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(pipeline.item_error, signal=signals.item_error)
+        return pipeline
+
+    def open_spider(self, spider):
+        if self.path:
+            self.index = ContentIndex(self.path, self.capacity, self.error_rate)
+        self.run_started = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+    def spider_closed(self, spider):
+        if self.index:
+            for digest in self.new_digests:
+                self.index.add(digest, self.run_started)
+            self.index.close()
+        self.new_digests.clear()
+
+    def item_error(self, item, response, spider, failure):
+        # A later pipeline failed on the item, so it was not stored
+        self.new_digests.discard(self.digest(item))
+
+    @staticmethod
+    def digest(item):
+        return content_hash(item['source_url'], normalize_text(item['description']))
+
+    def process_item(self, item, spider):
+        digest = self.digest(item)
+        if digest in self.seen_this_run:
+            self.stats.inc_value('dedup/in_run', spider=spider)
+            raise DuplicateItem(f'Estadística repetida en {item["source_url"]}')
+
+        self.seen_this_run.add(digest)
+        if self.index is None:
+            return item
+        first_seen = self.index.first_seen(digest)
+        if first_seen is None:
+            self.new_digests.add(digest)
+            self.stats.inc_value('dedup/new', spider=spider)
+            return item
+
+        self.stats.inc_value('dedup/previous_run', spider=spider)
+        if self.mode == 'skip':
+            raise DuplicateItem(f'Estadística ya guardada el {first_seen}')
+        item['first_seen'] = first_seen
+        return item
+
+
+class StatisticsExportPipeline:
+    """Writes items as they are scraped, flushing to the sink in batches.
+
+    Every run gets its own file (see STATISTICS_EXPORT_URI), so consecutive
+    crawls and multi-page crawls never overwrite each other's output. The
+    file is only created once the first item arrives: a run that scrapes
+    nothing (e.g. every page unchanged) leaves no header-only file behind.
+    """
+
+    def __init__(self, uri, export_format, compression, batch_size, fieldnames):
+        if export_format not in SINKS:
+            raise ValueError(f'Formato de exportación no soportado: {export_format}')
+        if compression not in COMPRESSIONS:
+            raise ValueError(f'Compresión no soportada: {compression}')
+        self.uri = uri
+        self.sink_class = SINKS[export_format]
+        self.compression = compression
+        self.batch_size = batch_size
+        self.fieldnames = fieldnames
+        self.buffer = []
+        self.items_written = 0
+        self.file = None
+        self.sink = None
+        self.path = None
+        self.base = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            uri=settings.get('STATISTICS_EXPORT_URI'),
+            export_format=settings.get('STATISTICS_EXPORT_FORMAT'),
+            compression=settings.get('STATISTICS_EXPORT_COMPRESSION') or None,
+            batch_size=settings.getint('STATISTICS_EXPORT_BATCH_SIZE'),
+            fieldnames=settings.getlist('STATISTICS_EXPORT_FIELDS'),
+        )
+
+    def open_spider(self, spider):
+        # Timestamped when the run starts, even if the file is created later
+        self.base = self.uri % {'name': spider.name, 'time': time.strftime('%Y-%m-%dT%H-%M-%S')}
+
+    def open_file(self):
+        opener, suffix = COMPRESSIONS[self.compression]
+        self.path = self.unique_path(self.base, self.sink_class.extension + suffix)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = opener(self.path, 'wt', newline='', encoding='utf-8')
+        self.sink = self.sink_class(self.file, self.fieldnames)
+
+    def process_item(self, item, spider):
+        self.buffer.append(dict(item))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+        return item
+
+    def close_spider(self, spider):
+        self.flush()
+        if self.file is None:
+            spider.logger.info('Ningún dato nuevo; no se crea archivo de salida')
+            return
+        self.file.close()
+        spider.logger.info(f'Datos guardados en {self.path} ({self.items_written} filas)')
+
+    def flush(self):
+        if not self.buffer:
+            return
+        if self.file is None:
+            self.open_file()
+        self.sink.write(self.buffer)
+        self.file.flush()
+        self.items_written += len(self.buffer)
+        self.buffer = []
+
+    @staticmethod
+    def unique_path(base, extension):
+        path = base + extension
+        counter = 1
+        while os.path.exists(path):
+            path = f'{base}-{counter}{extension}'
+            counter += 1
+        return path
+
+
+class SqliteStorePipeline:
+    """Adds every item to the indexed SQLite store (see store.py), in batched transactions."""
+
+    def __init__(self, path, batch_size):
+        self.path = path
+        self.batch_size = batch_size
+        self.buffer = []
+        self.store = None
+        self.fetched_at = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('STATISTICS_STORE_ENABLED'):
+            raise NotConfigured
+        return cls(settings.get('STATISTICS_STORE_PATH'), settings.getint('STATISTICS_STORE_BATCH_SIZE'))
+
+    def open_spider(self, spider):
+        self.store = StatisticsStore(self.path)
+        self.fetched_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+    def process_item(self, item, spider):
+        row = dict(item)
+        row['spider'] = spider.name
+        row['number'] = StatisticTokenizer.to_number(row['value'])
+        row['fetched_at'] = self.fetched_at
+        self.buffer.append(row)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+        return item
+
+    def close_spider(self, spider):
+        self.flush()
+        self.store.close()
+
+    def flush(self):
+        if self.buffer:
+            self.store.insert_many(self.buffer)
+            self.buffer = []
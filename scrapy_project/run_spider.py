@@ -1,6 +1,14 @@
 #!/usr/bin/env python3
 
+import argparse
+
 from motherless_spider import run_spider
 
 if __name__ == '__main__':
-    run_spider()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--discover', action='store_true',
+                        help='Descubrir y extraer todas las páginas de estadísticas del sitio')
+    parser.add_argument('--offline', action='store_true',
+                        help='Reproducir solo desde la caché HTTP, sin acceder a la red')
+    args = parser.parse_args()
+    run_spider(discover=args.discover, offline=args.offline)
@@ -0,0 +1,74 @@
+from collections import deque
+
+
+class SectionMatcher:
+    """Aho-Corasick index over lowercased section titles.
+
+    Built once per page; every paragraph is streamed through the automaton a
+    single time to find all titles it mentions.
+    """
+
+    def __init__(self, titles):
+        self.patterns = []
+        self.pattern_ids = {}
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        for title in titles:
+            key = title.strip().lower()
+            if key and key not in self.pattern_ids:
+                self.pattern_ids[key] = len(self.patterns)
+                self.patterns.append(key)
+                self.add_pattern(key)
+
+        self.build_failure_links()
+
+    def add_pattern(self, key):
+        state = 0
+        for char in key:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append(self.pattern_ids[key])
+
+    def build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def search(self, text):
+        """Return the set of pattern ids found in ``text`` (already lowercased)."""
+        found = set()
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+    def match(self, paragraphs):
+        """Map each title key to the indexes of the paragraphs that contain it, in order."""
+        matches = {key: [] for key in self.patterns}
+        if not self.patterns:
+            return matches
+        for index, paragraph in enumerate(paragraphs):
+            for pattern_id in self.search(paragraph.lower()):
+                matches[self.patterns[pattern_id]].append(index)
+        return matches
+
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Resident crawl service: one warm Twisted reactor that runs crawl jobs on demand.
+
+    python service.py --port 6800
+    curl -N -X POST localhost:6800/crawl \\
+         -d '{"spider": "motherless_homes", "urls": ["https://worldmetrics.org/motherless-homes-statistics/"]}'
+    curl localhost:6800/status
+
+POST /crawl answers with the job's items as JSON Lines, written while they
+are scraped. Jobs run concurrently up to --max-jobs; the rest wait in line.
+"""
+
+import argparse
+import json
+
+from scrapy import signals
+from scrapy.crawler import CrawlerRunner
+from scrapy.utils.log import configure_logging
+from scrapy.utils.project import get_project_settings
+from scrapy.utils.reactor import install_reactor
+from twisted.internet import defer
+from twisted.web import resource, server
+
+from motherless_spider import MotherlessHomesSpider, WorldMetricsStatisticsSpider
+
+SPIDERS = {spider.name: spider for spider in (MotherlessHomesSpider, WorldMetricsStatisticsSpider)}
+
+
+class CrawlJob:
+    def __init__(self, spider_class, urls, on_item):
+        self.spider_class = spider_class
+        self.urls = urls
+        self.on_item = on_item
+        self.crawler = None
+        self.cancelled = False
+
+    def item_scraped(self, item, response, spider):
+        self.on_item(item)
+
+    def cancel(self):
+        self.cancelled = True
+        if self.crawler and self.crawler.crawling:
+            self.crawler.stop()
+
+
+class CrawlService:
+    """Runs crawl jobs in one CrawlerRunner, at most ``max_jobs`` at a time."""
+
+    def __init__(self, settings, max_jobs=4):
+        self.runner = CrawlerRunner(settings)
+        self.semaphore = defer.DeferredSemaphore(max_jobs)
+        self.completed = 0
+
+    def submit(self, job):
+        return self.semaphore.run(self.run_job, job)
+
+    def run_job(self, job):
+        if job.cancelled:
+            return None
+        job.crawler = self.runner.create_crawler(job.spider_class)
+        job.crawler.signals.connect(job.item_scraped, signal=signals.item_scraped, weak=False)
+        kwargs = {'start_urls': job.urls} if job.urls else {}
+        d = self.runner.crawl(job.crawler, **kwargs)
+        d.addBoth(self.job_finished)
+        return d
+
+    def job_finished(self, result):
+        self.completed += 1
+        return result
+
+    def status(self):
+        return {
+            'running': len(self.runner.crawlers),
+            'queued': len(self.semaphore.waiting),
+            'completed': self.completed,
+            'spiders': sorted(SPIDERS),
+        }
+
+
+class CrawlResource(resource.Resource):
+    isLeaf = True
+
+    def __init__(self, service):
+        super().__init__()
+        self.service = service
+
+    def render_GET(self, request):
+        if request.path != b'/status':
+            request.setResponseCode(404)
+            return b''
+        request.setHeader(b'content-type', b'application/json')
+        return json.dumps(self.service.status()).encode('utf-8')
+
+    def render_POST(self, request):
+        if request.path != b'/crawl':
+            request.setResponseCode(404)
+            return b''
+        try:
+            body = json.loads(request.content.read() or b'{}')
+            spider_class = SPIDERS[body.get('spider', MotherlessHomesSpider.name)]
+            urls = list(body.get('urls') or [])
+        except (ValueError, KeyError, AttributeError, TypeError):
+            request.setResponseCode(400)
+            request.setHeader(b'content-type', b'application/json')
+            return json.dumps({'error': f'Se espera {{"spider": uno de {sorted(SPIDERS)}, "urls": [...]}}'}).encode('utf-8')
+
+        request.setHeader(b'content-type', b'application/x-ndjson')
+
+        def write_item(item):
+            if not job.cancelled:
+                request.write(json.dumps(dict(item), ensure_ascii=False).encode('utf-8') + b'\n')
+
+        def finished(result):
+            if not job.cancelled:
+                request.finish()
+
+        def failed(failure):
+            if not job.cancelled:
+                request.write(json.dumps({'error': failure.getErrorMessage()}).encode('utf-8') + b'\n')
+                request.finish()
+
+        job = CrawlJob(spider_class, urls, write_item)
+        # The client went away: stop the crawl instead of scraping for nobody
+        request.notifyFinish().addErrback(lambda failure: job.cancel())
+        self.service.submit(job).addCallbacks(finished, failed)
+        return server.NOT_DONE_YET
+
+
+def service_settings():
+    settings = get_project_settings()
+    # Callers ask for specific pages and expect their items back, even when
+    # the page did not change since an earlier crawl
+    settings.set('CONTENT_FINGERPRINT_ENABLED', False, priority='cmdline')
+    # Concurrent jobs cannot share the on-disk dedup index; repeats within
+    # each job are still dropped
+    settings.set('DEDUP_INDEX', '', priority='cmdline')
+    return settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=6800)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--max-jobs', type=int, default=4, help='Crawls ejecutados a la vez')
+    args = parser.parse_args()
+
+    settings = service_settings()
+    if settings.get('TWISTED_REACTOR'):
+        install_reactor(settings.get('TWISTED_REACTOR'), settings.get('ASYNCIO_EVENT_LOOP'))
+    configure_logging(settings)
+    from twisted.internet import reactor
+
+    service = CrawlService(settings, args.max_jobs)
+    reactor.listenTCP(args.port, server.Site(CrawlResource(service)), interface=args.host)
+    print(f'Servicio de crawling escuchando en http://{args.host}:{args.port}')
+    reactor.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,12 +3,83 @@ SPIDER_MODULES = ['motherless_spider']
 NEWSPIDER_MODULE = 'motherless_spider'
 
 ROBOTSTXT_OBEY = False
-DOWNLOAD_DELAY = 1
-CONCURRENT_REQUESTS_PER_DOMAIN = 1
 COOKIES_ENABLED = False
 
+# AutoThrottle adjusts delay and effective concurrency from observed latency;
+# DOWNLOAD_DELAY is the floor and CONCURRENT_REQUESTS_PER_DOMAIN the ceiling.
+DOWNLOAD_DELAY = 0.25
+CONCURRENT_REQUESTS_PER_DOMAIN = 16
+AUTOTHROTTLE_ENABLED = True
+AUTOTHROTTLE_START_DELAY = 1
+AUTOTHROTTLE_MAX_DELAY = 30
+AUTOTHROTTLE_TARGET_CONCURRENCY = 4.0
+
+# Backs off per-domain on 429/5xx and connection errors (see middlewares.py)
+ERROR_THROTTLE_ENABLED = True
+ERROR_THROTTLE_WINDOW = 20
+ERROR_THROTTLE_THRESHOLD = 0.2
+ERROR_THROTTLE_BACKOFF = 2.0
+
 DEFAULT_REQUEST_HEADERS = {
    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
    'Accept-Language': 'en',
    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
 }
+
+# On-disk cache in .scrapy/httpcache: responses are stored with their ETag and
+# Last-Modified headers and revalidated with conditional requests.
+HTTPCACHE_ENABLED = True
+HTTPCACHE_POLICY = 'scrapy.extensions.httpcache.RFC2616Policy'
+HTTPCACHE_DIR = 'httpcache'
+HTTPCACHE_EXPIRATION_SECS = 0
+HTTPCACHE_ALWAYS_STORE = True
+
+# Pages whose body hash did not change since the last crawl are not re-extracted
+CONTENT_FINGERPRINT_ENABLED = True
+CONTENT_FINGERPRINT_DB = 'fingerprints/content'
+
+DOWNLOADER_MIDDLEWARES = {
+   'middlewares.ErrorRateThrottleMiddleware': 590,
+   'middlewares.ContentFingerprintMiddleware': 850,
+}
+
+# Per-stage timings (timing/<stage>/...) are kept in the stats and exported with
+# the rest of them as JSON and Prometheus text when the spider closes
+EXTENSIONS = {
+   'instrumentation.MetricsExporter': 500,
+}
+METRICS_EXPORT_PATH = 'output/metrics/%(name)s'
+
+ITEM_PIPELINES = {
+   'pipelines.DeduplicationPipeline': 200,
+   'pipelines.StatisticsExportPipeline': 300,
+   'pipelines.SqliteStorePipeline': 400,
+}
+
+# Repeated statistics within a page are dropped; ones stored by an earlier
+# run are tagged with first_seen ('tag') or dropped ('skip')
+DEDUP_ENABLED = True
+DEDUP_MODE = 'tag'
+DEDUP_INDEX = 'dedup/content'
+DEDUP_BLOOM_CAPACITY = 1000000
+DEDUP_BLOOM_ERROR_RATE = 0.001
+# Dedup drops are expected and logged at DEBUG instead of Scrapy's WARNING
+LOG_FORMATTER = 'pipelines.DedupLogFormatter'
+
+# %(name)s and %(time)s are filled per run; the sink adds the file extension
+STATISTICS_EXPORT_URI = 'output/%(name)s_%(time)s'
+STATISTICS_EXPORT_FORMAT = 'csv'  # csv | jsonl
+STATISTICS_EXPORT_COMPRESSION = None  # None | gzip | bz2 | xz
+STATISTICS_EXPORT_BATCH_SIZE = 100
+STATISTICS_EXPORT_FIELDS = ['source_url', 'category', 'statistic_number', 'description', 'value', 'unit', 'first_seen']
+
+# Indexed copy of every run for lookups (python store.py query ...)
+STATISTICS_STORE_ENABLED = True
+STATISTICS_STORE_PATH = 'output/statistics.sqlite'
+STATISTICS_STORE_BATCH_SIZE = 500
+
+# Sharded crawls (shard.py): workers share this frontier and claim at most
+# one URL per host every FRONTIER_HOST_DELAY seconds between all of them
+FRONTIER_PATH = 'frontier/urls.sqlite'
+FRONTIER_HOST_DELAY = 0.25
+FRONTIER_POLL_INTERVAL = 0.1
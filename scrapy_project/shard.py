@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Sharded crawl: several worker processes share one frontier, then their outputs are merged.
+
+    python shard.py --workers 8
+    python shard.py --workers 4 --url https://worldmetrics.org/pets-statistics/
+    python shard.py --workers 4 --frontier output/shards/frontier.sqlite   # resume
+
+Each worker is a separate process with its own reactor, claiming URLs from
+the SQLite frontier (see frontier.py) and adding the links it discovers to
+it, so no page is fetched twice and the per-host delay holds across all of
+them. Workers write their own export file; the merged one is written to
+output/ once every worker has finished.
+"""
+
+import argparse
+import glob
+import multiprocessing
+import os
+import time
+
+from scrapy.utils.project import get_project_settings
+
+from frontier import Frontier
+from pipelines import COMPRESSIONS, SINKS
+
+
+def run_worker(worker_id, frontier_path, run_folder, host_delay):
+    from scrapy.crawler import CrawlerProcess
+    from motherless_spider import ShardedStatisticsSpider
+
+    settings = get_project_settings()
+    settings.setdict({
+        'STATISTICS_EXPORT_URI': os.path.join(run_folder, f'worker-{worker_id}'),
+        'METRICS_EXPORT_PATH': os.path.join(run_folder, 'metrics', f'worker-{worker_id}'),
+        'FRONTIER_HOST_DELAY': host_delay,
+        # The frontier already guarantees each page is fetched once per run;
+        # the dbm files behind these two only allow one writer at a time
+        'CONTENT_FINGERPRINT_ENABLED': False,
+        'DEDUP_INDEX': '',
+    }, priority='cmdline')
+    process = CrawlerProcess(settings)
+    process.crawl(ShardedStatisticsSpider, frontier_path=frontier_path, worker_id=str(worker_id))
+    process.start()
+
+
+def merge_outputs(paths, output_path, opener, header):
+    """Concatenate the worker files, keeping only the first CSV header."""
+    rows = 0
+    with opener(output_path, 'wt', newline='', encoding='utf-8') as output:
+        for i, path in enumerate(paths):
+            with opener(path, 'rt', newline='', encoding='utf-8') as f:
+                for line_number, line in enumerate(f):
+                    if header and line_number == 0:
+                        if i == 0:
+                            output.write(line)
+                        continue
+                    output.write(line)
+                    rows += 1
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='Procesos de crawling')
+    parser.add_argument('--frontier', help='Frontier SQLite compartida (por defecto una nueva dentro de la carpeta del run)')
+    parser.add_argument('--url', action='append', dest='urls', help='URL semilla (repetible)')
+    parser.add_argument('--host-delay', type=float, help='Segundos entre peticiones al mismo host, entre todos los workers')
+    args = parser.parse_args()
+
+    from motherless_spider import ShardedStatisticsSpider
+
+    settings = get_project_settings()
+    run_time = time.strftime('%Y-%m-%dT%H-%M-%S')
+    run_folder = os.path.join('output', 'shards', run_time)
+    os.makedirs(run_folder, exist_ok=True)
+    frontier_path = args.frontier or os.path.join(run_folder, 'frontier.sqlite')
+    host_delay = args.host_delay if args.host_delay is not None else settings.getfloat('FRONTIER_HOST_DELAY')
+
+    frontier = Frontier(frontier_path)
+    added = frontier.add(args.urls or ShardedStatisticsSpider.start_urls)
+    print(f'Frontier {frontier_path}: {added} semillas nuevas, estado {frontier.counts()}')
+    frontier.close()
+
+    # spawn: every worker starts its own reactor from a clean interpreter
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=run_worker, args=(i, frontier_path, run_folder, host_delay))
+               for i in range(args.workers)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    failed = [i for i, worker in enumerate(workers) if worker.exitcode != 0]
+    if failed:
+        print(f'Workers con error: {failed}')
+
+    export_format = settings.get('STATISTICS_EXPORT_FORMAT')
+    opener, suffix = COMPRESSIONS[settings.get('STATISTICS_EXPORT_COMPRESSION') or None]
+    extension = SINKS[export_format].extension + suffix
+    paths = sorted(glob.glob(os.path.join(run_folder, f'worker-*{extension}')))
+    output_path = os.path.join('output', f'{ShardedStatisticsSpider.name}_{run_time}{extension}')
+    rows = merge_outputs(paths, output_path, opener, header=export_format == 'csv')
+
+    frontier = Frontier(frontier_path)
+    counts = frontier.counts()
+    frontier.close()
+    print(f'{args.workers} workers en {time.perf_counter() - started:.1f}s, URLs {counts}')
+    print(f'Datos combinados en {output_path} ({rows} filas de {len(paths)} archivos)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Indexed SQLite store for the scraped statistics.
+
+    python store.py query --category "Key Findings" --unit percentage
+    python store.py query --url https://worldmetrics.org/motherless-homes-statistics/ --format csv
+    python store.py summary
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS statistics (
+    id INTEGER PRIMARY KEY,
+    spider TEXT NOT NULL,
+    source_url TEXT NOT NULL,
+    category TEXT NOT NULL,
+    statistic_number INTEGER,
+    description TEXT NOT NULL,
+    value TEXT,
+    number REAL,
+    unit TEXT,
+    fetched_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS statistics_source_url ON statistics (source_url);
+CREATE INDEX IF NOT EXISTS statistics_category ON statistics (category);
+CREATE INDEX IF NOT EXISTS statistics_unit ON statistics (unit);
+CREATE INDEX IF NOT EXISTS statistics_fetched_at ON statistics (fetched_at);
+"""
+
+COLUMNS = ['spider', 'source_url', 'category', 'statistic_number', 'description', 'value', 'number', 'unit',
+           'fetched_at']
+
+
+class StatisticsStore:
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        # Readers (dashboards) do not block the crawl's writes
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+
+    def insert_many(self, rows):
+        """Insert dicts with the COLUMNS keys in one transaction."""
+        placeholders = ', '.join('?' for _ in COLUMNS)
+        with self.connection:
+            self.connection.executemany(
+                f'INSERT INTO statistics ({", ".join(COLUMNS)}) VALUES ({placeholders})',
+                [tuple(row.get(column) for column in COLUMNS) for row in rows])
+
+    def query(self, source_url=None, category=None, unit=None, since=None, until=None, limit=None):
+        """Rows matching every given filter, newest first. ``since``/``until`` are ISO timestamps."""
+        conditions = []
+        params = []
+        for column, value in (('source_url', source_url), ('category', category), ('unit', unit)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        if since:
+            conditions.append('fetched_at >= ?')
+            params.append(since)
+        if until:
+            conditions.append('fetched_at < ?')
+            params.append(until)
+        sql = 'SELECT * FROM statistics'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY fetched_at DESC, id'
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def summary(self):
+        return [dict(row) for row in self.connection.execute(
+            'SELECT source_url, category, count(*) AS rows, max(fetched_at) AS last_fetched_at '
+            'FROM statistics GROUP BY source_url, category ORDER BY source_url, category')]
+
+    def close(self):
+        self.connection.close()
+
+
+def print_rows(rows, output_format):
+    if output_format == 'json':
+        for row in rows:
+            print(json.dumps(row, ensure_ascii=False))
+        return
+    if not rows:
+        return
+    writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]), delimiter='\t' if output_format == 'table' else ',')
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--db', default='output/statistics.sqlite')
+    common.add_argument('--format', choices=['table', 'csv', 'json'], default='table')
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    query = commands.add_parser('query', parents=[common], help='Estadísticas que cumplen los filtros')
+    query.add_argument('--url', help='URL de origen')
+    query.add_argument('--category')
+    query.add_argument('--unit')
+    query.add_argument('--since', help='Desde esta fecha ISO (incluida)')
+    query.add_argument('--until', help='Hasta esta fecha ISO (excluida)')
+    query.add_argument('--limit', type=int, default=100)
+    commands.add_parser('summary', parents=[common], help='Filas por página y categoría')
+    args = parser.parse_args()
+
+    store = StatisticsStore(args.db)
+    try:
+        if args.command == 'query':
+            rows = store.query(args.url, args.category, args.unit, args.since, args.until, args.limit)
+        else:
+            rows = store.summary()
+        print_rows(rows, args.format)
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
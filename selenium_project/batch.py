@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Fetch many datos.gov.co datasets in parallel.
+
+API downloads run on a thread pool; datasets whose API download fails are
+retried through the browser on a bounded process pool, each worker process
+leasing one warm Chrome session across its datasets. Every dataset gets its
+own folder under ``datasets/`` and a manifest in ``datasets/manifests/``.
+"""
+
+import argparse
+import json
+import os
+import time
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import util
+
+from selenium_spider import ColombiaDataPortalSpider, create_browser_pool
+
+# Set in each browser worker process by init_browser_worker
+worker_browser_pool = None
+
+
+def load_dataset_ids(ids=None, path=None):
+    dataset_ids = list(ids or [])
+    if path:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    dataset_ids.append(line)
+    # Keep the given order but drop repeated ids
+    return list(dict.fromkeys(dataset_ids))
+
+
+def build_manifest(spider, method, success, started, error=None):
+    files = [path for path in spider.downloaded_files if os.path.exists(path)]
+    return {
+        'dataset_id': spider.dataset_id,
+        'method': method,
+        'status': 'ok' if success else 'failed',
+        'rows': spider.rows_downloaded,
+        'bytes': sum(os.path.getsize(path) for path in files),
+        'files': files,
+        'seconds': round(time.monotonic() - started, 3),
+        'error': error,
+        'metrics': spider.metrics.to_dict(),
+    }
+
+
+def failed_manifest(dataset_id, method, error):
+    """Manifest for a dataset whose worker died before it could report anything."""
+    return {
+        'dataset_id': dataset_id,
+        'method': method,
+        'status': 'failed',
+        'rows': 0,
+        'bytes': 0,
+        'files': [],
+        'seconds': None,
+        'error': error,
+        'metrics': {},
+    }
+
+
+def fetch_from_api(dataset_id, output_folder, sync=False, store_path=None):
+    started = time.monotonic()
+    spider = ColombiaDataPortalSpider(dataset_id)
+    spider.datasets_folder = os.path.join(output_folder, dataset_id)
+    spider.web_fallback = False
+    spider.store_path = store_path
+    try:
+        spider.create_datasets_folder()
+        if sync:
+            success = spider.sync_dataset_from_api(dataset_id)
+        else:
+            success = spider.download_dataset_from_api(dataset_id)
+        return build_manifest(spider, 'api', success, started)
+    except Exception as e:
+        return build_manifest(spider, 'api', False, started, str(e))
+
+
+def init_browser_worker(network_capture=False):
+    """ProcessPoolExecutor initializer: one pooled browser per worker process."""
+    global worker_browser_pool
+    try:
+        worker_browser_pool = create_browser_pool(size=1, network_capture=network_capture)
+    except Exception as e:
+        # A failing initializer breaks the whole executor; the spiders retry Chrome themselves
+        print(f"No se pudo iniciar el pool de navegadores: {e}")
+        return
+    # Pool workers exit without running atexit hooks; multiprocessing finalizers do run
+    util.Finalize(None, worker_browser_pool.close, exitpriority=10)
+
+
+def fetch_from_web(dataset_id, output_folder, store_path=None, network_capture=False):
+    started = time.monotonic()
+    spider = ColombiaDataPortalSpider(dataset_id, browser_pool=worker_browser_pool)
+    spider.datasets_folder = os.path.join(output_folder, dataset_id)
+    spider.store_path = store_path
+    spider.network_capture = network_capture
+    try:
+        spider.create_datasets_folder()
+        if not spider.setup_driver():
+            return build_manifest(spider, 'web', False, started, 'No se pudo configurar el driver de Chrome')
+        title = spider.get_dataset_info_from_web()
+        success = spider.download_dataset_from_web(title)
+        return build_manifest(spider, 'web', success, started)
+    except Exception as e:
+        return build_manifest(spider, 'web', False, started, str(e))
+    finally:
+        spider.release_driver()
+
+
+def write_manifest(output_folder, manifest):
+    manifests_folder = os.path.join(output_folder, 'manifests')
+    os.makedirs(manifests_folder, exist_ok=True)
+    path = os.path.join(manifests_folder, f"{manifest['dataset_id']}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+
+def create_browser_executor(browser_workers, network_capture):
+    # spawn, not fork: the API threads are running when browser workers start
+    return ProcessPoolExecutor(max_workers=browser_workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=init_browser_worker, initargs=(network_capture,))
+
+
+def run_batch(dataset_ids, output_folder='datasets', api_workers=8, browser_workers=2, sync=False,
+              store_path=None, network_capture=False):
+    manifests = {}
+    # Browser fallbacks in flight: future -> (dataset_id, executor, attempt)
+    web_futures = {}
+    browser_pool = create_browser_executor(browser_workers, network_capture)
+
+    def submit_web(dataset_id, attempt):
+        # Retries run alone, so a dataset that crashes its worker again takes no other one down with it
+        executor = browser_pool if attempt == 1 else create_browser_executor(1, network_capture)
+        future = executor.submit(fetch_from_web, dataset_id, output_folder, store_path, network_capture)
+        web_futures[future] = (dataset_id, executor, attempt)
+        return future
+
+    try:
+        with ThreadPoolExecutor(max_workers=api_workers) as api_pool:
+            pending = {api_pool.submit(fetch_from_api, dataset_id, output_folder, sync, store_path) for dataset_id in dataset_ids}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        manifest = future.result()
+                    except BrokenProcessPool:
+                        # A browser worker died (e.g. Chrome killed for memory). Every fallback
+                        # queued on that executor fails with it, so each gets one more try on a new one
+                        dataset_id, executor, attempt = web_futures.pop(future)
+                        executor.shutdown(wait=False)
+                        if executor is browser_pool:
+                            browser_pool = create_browser_executor(browser_workers, network_capture)
+                        if attempt < 2:
+                            print(f"El proceso del navegador terminó inesperadamente; se reintenta {dataset_id}")
+                            pending.add(submit_web(dataset_id, attempt + 1))
+                            continue
+                        manifest = failed_manifest(dataset_id, 'web', 'El proceso del navegador terminó inesperadamente')
+                    if future in web_futures:
+                        _, executor, _ = web_futures.pop(future)
+                        if executor is not browser_pool:
+                            executor.shutdown()
+                    if manifest['status'] != 'ok' and manifest['method'] == 'api':
+                        print(f"API falló para {manifest['dataset_id']}; se intenta con el navegador")
+                        pending.add(submit_web(manifest['dataset_id'], 1))
+                        continue
+                    manifests[manifest['dataset_id']] = manifest
+                    write_manifest(output_folder, manifest)
+                    print(f"[{len(manifests)}/{len(dataset_ids)}] {manifest['dataset_id']}: "
+                          f"{manifest['status']} ({manifest['method']}, {manifest['rows']} filas, {manifest['seconds']}s)")
+    finally:
+        browser_pool.shutdown()
+    return [manifests[dataset_id] for dataset_id in dataset_ids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('dataset_ids', nargs='*', help='Identificadores de datasets (p. ej. ie2a-j7h9)')
+    parser.add_argument('--file', help='Archivo con un identificador por línea')
+    parser.add_argument('--output', default='datasets')
+    parser.add_argument('--api-workers', type=int, default=8)
+    parser.add_argument('--browser-workers', type=int, default=2)
+    parser.add_argument('--sync', action='store_true',
+                        help='Actualizar la copia local con solo los registros modificados')
+    parser.add_argument('--store', metavar='RUTA',
+                        help='Guardar también los registros en esta base de datos SQLite')
+    parser.add_argument('--network-capture', action='store_true',
+                        help='En el navegador, guardar los datos JSON que carga la página en vez de leer el DOM')
+    args = parser.parse_args()
+
+    dataset_ids = load_dataset_ids(args.dataset_ids, args.file)
+    if not dataset_ids:
+        parser.error('Indica al menos un dataset o --file')
+
+    manifests = run_batch(dataset_ids, args.output, args.api_workers, args.browser_workers, args.sync,
+                          args.store, args.network_capture)
+    failed = [manifest['dataset_id'] for manifest in manifests if manifest['status'] != 'ok']
+    print(f"\nCompletados: {len(manifests) - len(failed)}/{len(manifests)}")
+    if failed:
+        print(f"Fallidos: {', '.join(failed)}")
+
+
+if __name__ == '__main__':
+    main()
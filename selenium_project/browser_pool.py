@@ -0,0 +1,187 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+# Every kind of site data Storage.clearDataForOrigin can drop
+STORAGE_TYPES = "all"
+
+
+class PooledBrowser:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.monotonic()
+
+
+class BrowserPool:
+    """Pre-warmed browser sessions leased and returned across dataset fetches.
+
+    Sessions are health-checked on lease and pointed at the lessee's download
+    folder, reset on return (cookies, site data, blocked URLs, buffered
+    network log, extra windows, blank page) and recycled after ``max_uses``
+    leases or once their JS heap goes over ``max_memory_mb``.
+
+    A slot whose replacement browser could not be started stays in the pool
+    empty (``None``) and is filled on the next lease, so a failed launch
+    never shrinks the pool. ``release`` never raises.
+    """
+
+    def __init__(self, factory, size=2, max_uses=50, max_memory_mb=None, lease_timeout=300):
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self.lease_timeout = lease_timeout
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.all_browsers = set()
+        self.closed = False
+        for _ in range(size):
+            self.idle.put(self.create())
+
+    def create(self):
+        browser = PooledBrowser(self.factory())
+        with self.lock:
+            self.all_browsers.add(browser)
+        return browser
+
+    def discard(self, browser):
+        with self.lock:
+            self.all_browsers.discard(browser)
+        try:
+            browser.driver.quit()
+        except Exception:
+            pass
+
+    def replace(self, browser):
+        """Discard ``browser`` and start a new one, or None if that fails (the slot is filled later)."""
+        if browser is not None:
+            self.discard(browser)
+        try:
+            return self.create()
+        except Exception as e:
+            print(f"No se pudo iniciar un navegador para el pool: {e}")
+            return None
+
+    def acquire(self, download_dir=None):
+        if self.closed:
+            raise RuntimeError("El pool de navegadores está cerrado")
+        browser = self.idle.get(timeout=self.lease_timeout)
+        try:
+            if browser is None:
+                browser = self.create()
+            elif not self.is_healthy(browser):
+                print("Navegador del pool no responde; se reemplaza")
+                self.discard(browser)
+                # Already discarded: a failing create below leaves an empty slot
+                browser = None
+                browser = self.create()
+            if download_dir:
+                self.set_download_dir(browser, download_dir)
+        except Exception:
+            # Give the slot back, empty, so the pool keeps its size
+            if browser is not None:
+                self.discard(browser)
+            self.idle.put(None)
+            raise
+        return browser
+
+    def release(self, browser):
+        try:
+            browser.uses += 1
+            if self.closed:
+                self.discard(browser)
+                return
+            if self.should_recycle(browser):
+                browser = self.replace(browser)
+            else:
+                try:
+                    self.reset(browser)
+                except Exception:
+                    browser = self.replace(browser)
+        except Exception as e:
+            print(f"Error devolviendo el navegador al pool: {e}")
+            browser = self.replace(browser)
+        self.idle.put(browser)
+
+    @contextmanager
+    def lease(self, download_dir=None):
+        browser = self.acquire(download_dir)
+        try:
+            yield browser.driver
+        finally:
+            self.release(browser)
+
+    def set_download_dir(self, browser, download_dir):
+        # The download.default_directory pref is fixed when Chrome starts; this applies per lease
+        browser.driver.execute_cdp_cmd("Browser.setDownloadBehavior", {
+            "behavior": "allow",
+            "downloadPath": os.path.abspath(download_dir),
+        })
+
+    def is_healthy(self, browser):
+        try:
+            return browser.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def memory_mb(self, browser):
+        try:
+            browser.driver.execute_cdp_cmd("Performance.enable", {})
+            metrics = browser.driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+        except Exception:
+            return None
+        for metric in metrics:
+            if metric["name"] == "JSHeapUsedSize":
+                return metric["value"] / (1024 * 1024)
+        return None
+
+    def should_recycle(self, browser):
+        if self.max_uses and browser.uses >= self.max_uses:
+            return True
+        if self.max_memory_mb:
+            memory = self.memory_mb(browser)
+            return memory is not None and memory > self.max_memory_mb
+        return False
+
+    def reset(self, browser):
+        driver = browser.driver
+        handles = driver.window_handles
+        origins = set()
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            origins.add(driver.execute_script("return location.origin"))
+            driver.close()
+        driver.switch_to.window(handles[0])
+        origins.add(driver.execute_script("return location.origin"))
+        for origin in origins:
+            if origin and origin != "null":
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin",
+                                       {"origin": origin, "storageTypes": STORAGE_TYPES})
+        # Cookies of every domain, not only the current page's
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        # Undo NetworkCapture: no blocked URLs, no events left for the next lessee.
+        # Each fails only if capture never ran in this session, and then there is nothing to undo
+        try:
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+        except Exception:
+            pass
+        try:
+            driver.get_log("performance")
+        except Exception:
+            pass
+        driver.get("about:blank")
+
+    def close(self):
+        self.closed = True
+        with self.lock:
+            browsers = list(self.all_browsers)
+            self.all_browsers.clear()
+        for browser in browsers:
+            try:
+                browser.driver.quit()
+            except Exception:
+                pass
+
@@ -0,0 +1,118 @@
+# JavaScript run inside the browser so that a whole structure comes back in a
+# single WebDriver call instead of one round trip per element.
+
+# arguments[0]: <table> element. Returns {headers: [...], rows: [[...], ...]}
+# following the same header/row rules extract_data_from_table always used.
+TABLE_EXTRACT_SCRIPT = """
+const table = arguments[0];
+const text = (cell) => (cell.innerText || cell.textContent || '').trim();
+const cellsOf = (row, tag) => Array.from(row.children).filter((cell) => cell.tagName === tag);
+
+let headers = [];
+const thead = table.querySelector('thead');
+const tbody = table.querySelector('tbody');
+if (thead) {
+    headers = Array.from(thead.querySelectorAll('th')).map(text).filter((value) => value);
+} else if (tbody && tbody.rows.length) {
+    headers = cellsOf(tbody.rows[0], 'TD').map(text).filter((value) => value);
+}
+
+const dataRows = tbody ? Array.from(tbody.rows) : Array.from(table.rows).slice(1);
+const rows = [];
+for (const row of dataRows) {
+    const cells = cellsOf(row, 'TD');
+    if (cells.length) {
+        rows.push(cells.map(text));
+    }
+}
+
+if (!headers.length && table.rows.length) {
+    headers = cellsOf(table.rows[0], 'TD').map((_, i) => 'Columna_' + (i + 1));
+}
+return {headers: headers, rows: rows};
+"""
+
+# arguments[0]: element with role="grid"; arguments[1]: async callback.
+# Virtualized grids only render the visible rows, so the script scrolls the
+# grid's scroll container to the end, collecting rows by aria-rowindex (or,
+# without it, by their offset in the scrolled content).
+GRID_EXTRACT_SCRIPT = """
+const grid = arguments[0];
+const done = arguments[arguments.length - 1];
+const text = (cell) => (cell.innerText || cell.textContent || '').trim();
+const scroller = [grid, ...grid.querySelectorAll('*')].find(
+    (el) => el.scrollHeight > el.clientHeight + 1 && getComputedStyle(el).overflowY !== 'visible'
+) || grid;
+
+const headers = Array.from(grid.querySelectorAll('[role="columnheader"]')).map(text);
+const rows = new Map();
+// Without aria-rowindex a row is keyed by its offset within the scrolled
+// content: virtualized grids reuse DOM nodes (and their position among the
+// rendered rows) for different records, but each record keeps its offset.
+const offsetOf = (row) =>
+    Math.round(row.getBoundingClientRect().top - scroller.getBoundingClientRect().top + scroller.scrollTop);
+const collect = () => {
+    grid.querySelectorAll('[role="row"]').forEach((row) => {
+        const cells = row.querySelectorAll('[role="gridcell"], [role="cell"]');
+        if (!cells.length) {
+            return;
+        }
+        const index = row.getAttribute('aria-rowindex');
+        const key = index !== null ? Number(index) : offsetOf(row);
+        if (!rows.has(key)) {
+            rows.set(key, Array.from(cells).map(text));
+        }
+    });
+};
+
+let lastTop = -1;
+const step = () => {
+    collect();
+    if (scroller.scrollTop === lastTop) {
+        const ordered = Array.from(rows.keys()).sort((a, b) => a - b).map((key) => rows.get(key));
+        done({headers: headers, rows: ordered});
+        return;
+    }
+    lastTop = scroller.scrollTop;
+    scroller.scrollTop += Math.max(scroller.clientHeight, 1);
+    setTimeout(step, 150);
+};
+step();
+"""
+
+# Returns the first enabled "next page" control of a paginated grid, or null.
+NEXT_PAGE_SCRIPT = """
+const selectors = [
+    'button[aria-label*="Next" i]',
+    'button[aria-label*="Siguiente" i]',
+    'a[aria-label*="Next" i]',
+    'a[aria-label*="Siguiente" i]',
+    '.pager-button-next',
+    '.pagination .next a',
+];
+for (const selector of selectors) {
+    for (const el of document.querySelectorAll(selector)) {
+        const disabled = el.disabled || el.getAttribute('aria-disabled') === 'true' ||
+            el.classList.contains('disabled');
+        if (!disabled && el.offsetParent !== null) {
+            return el;
+        }
+    }
+}
+return null;
+"""
+
+# Every link and button on the page with the attributes used to rank download
+# candidates. Buttons carry their element so they can be clicked afterwards.
+DOWNLOAD_CANDIDATES_SCRIPT = """
+const clean = (value) => (value || '').replace(/\\s+/g, ' ').trim();
+return Array.from(document.querySelectorAll('a, button')).map((el) => ({
+    tag: el.tagName.toLowerCase(),
+    href: el.tagName === 'A' ? el.href : '',
+    title: clean(el.getAttribute('title')),
+    aria_label: clean(el.getAttribute('aria-label')),
+    class_name: clean(typeof el.className === 'string' ? el.className : ''),
+    text: clean(el.innerText).slice(0, 200),
+    element: el.tagName === 'BUTTON' ? el : null,
+}));
+"""
@@ -0,0 +1,57 @@
+import json
+import os
+import shutil
+
+# Where the driver found by webdriver_manager is pinned for later runs
+CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "datos-portal", "chromedriver.json")
+
+
+def read_pinned_driver(cache_file):
+    try:
+        with open(cache_file, encoding='utf-8') as f:
+            path = json.load(f).get('path')
+    except (OSError, ValueError):
+        return None
+    return path if path and os.access(path, os.X_OK) else None
+
+
+def pin_driver(cache_file, path):
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        json.dump({'path': path}, f)
+
+
+def resolve_chromedriver(cache_file=CACHE_FILE):
+    """Return ``(path, source)`` of the chromedriver binary to use.
+
+    Tried in order, only the last one touching the network:
+    CHROMEDRIVER_PATH, the driver pinned by an earlier run, chromedriver on
+    PATH, and finally webdriver_manager, whose result is pinned.
+    """
+    path = os.environ.get("CHROMEDRIVER_PATH")
+    if path:
+        if not os.access(path, os.X_OK):
+            raise FileNotFoundError(f"CHROMEDRIVER_PATH no apunta a un ejecutable: {path}")
+        return path, "CHROMEDRIVER_PATH"
+
+    path = read_pinned_driver(cache_file)
+    if path:
+        return path, "caché local"
+
+    path = shutil.which("chromedriver")
+    if path:
+        return path, "PATH"
+
+    return download_chromedriver(cache_file), "webdriver_manager"
+
+
+def download_chromedriver(cache_file=CACHE_FILE):
+    """Fetch the driver matching the installed Chrome through webdriver_manager and pin it.
+
+    Also the way out when a pinned or PATH driver no longer starts the
+    browser, typically after Chrome updated itself.
+    """
+    from webdriver_manager.chrome import ChromeDriverManager
+    path = ChromeDriverManager().install()
+    pin_driver(cache_file, path)
+    return path
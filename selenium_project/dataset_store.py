@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Indexed SQLite store for the downloaded datasets.
+
+    python dataset_store.py datasets
+    python dataset_store.py rows ie2a-j7h9 --where municipio=Mistrató --limit 20
+    python dataset_store.py rows ie2a-j7h9 --format csv > dataset.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    dataset_id TEXT PRIMARY KEY,
+    title TEXT,
+    method TEXT,
+    rows INTEGER,
+    fetched_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS datasets_fetched_at ON datasets (fetched_at);
+CREATE TABLE IF NOT EXISTS dataset_rows (
+    id INTEGER PRIMARY KEY,
+    dataset_id TEXT NOT NULL,
+    row_number INTEGER NOT NULL,
+    fetched_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dataset_rows_dataset ON dataset_rows (dataset_id, row_number);
+CREATE INDEX IF NOT EXISTS dataset_rows_fetched_at ON dataset_rows (fetched_at);
+"""
+
+
+class DatasetStore:
+    """One row per dataset record, stored as JSON; the latest download replaces the previous one."""
+
+    def __init__(self, path, batch_size=5000):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.batch_size = batch_size
+        # Batch runs write from several threads and processes, each with its own connection
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def write_dataset(self, dataset_id, title, method, rows):
+        """Replace the stored rows of ``dataset_id`` with ``rows`` (dicts).
+
+        Rows are committed every ``batch_size`` so other writers are never
+        locked out for a whole dataset. Readers keep seeing the previous
+        version, since ``rows`` only returns the rows of the fetch recorded
+        in ``datasets``; that record is switched, and the old rows deleted,
+        once every new row is in.
+        """
+        # Microseconds keep two writes of the same dataset apart
+        fetched_at = datetime.now(timezone.utc).isoformat(timespec='microseconds')
+        count = 0
+        batch = []
+        statement = "INSERT INTO dataset_rows (dataset_id, row_number, fetched_at, data) VALUES (?, ?, ?, ?)"
+        for row in rows:
+            batch.append((dataset_id, count, fetched_at, json.dumps(row, ensure_ascii=False)))
+            count += 1
+            if len(batch) >= self.batch_size:
+                with self.connection:
+                    self.connection.executemany(statement, batch)
+                batch = []
+        with self.connection:
+            if batch:
+                self.connection.executemany(statement, batch)
+            self.connection.execute(
+                "INSERT INTO datasets (dataset_id, title, method, rows, fetched_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(dataset_id) DO UPDATE SET title = excluded.title, method = excluded.method, "
+                "rows = excluded.rows, fetched_at = excluded.fetched_at",
+                (dataset_id, title, method, count, fetched_at))
+            # Also drops rows left behind by an interrupted earlier write
+            self.connection.execute("DELETE FROM dataset_rows WHERE dataset_id = ? AND fetched_at != ?",
+                                    (dataset_id, fetched_at))
+        return count
+
+    def datasets(self, since=None):
+        sql = "SELECT * FROM datasets"
+        params = []
+        if since:
+            sql += " WHERE fetched_at >= ?"
+            params.append(since)
+        return [dict(row) for row in self.connection.execute(sql + " ORDER BY fetched_at DESC", params)]
+
+    def rows(self, dataset_id, where=None, limit=None, offset=0):
+        """Rows of ``dataset_id`` in download order; ``where`` maps field names to exact values."""
+        sql = ("SELECT data FROM dataset_rows WHERE dataset_id = ? "
+               "AND fetched_at = (SELECT fetched_at FROM datasets WHERE dataset_id = ?)")
+        params = [dataset_id, dataset_id]
+        for field, value in (where or {}).items():
+            sql += " AND json_extract(data, ?) = ?"
+            params.extend([f'$."{field}"', value])
+        sql += " ORDER BY row_number LIMIT ? OFFSET ?"
+        params.extend([limit if limit else -1, offset])
+        return [json.loads(data) for (data,) in self.connection.execute(sql, params)]
+
+    def close(self):
+        self.connection.close()
+
+
+def print_rows(rows, output_format):
+    if output_format == 'json':
+        for row in rows:
+            print(json.dumps(row, ensure_ascii=False))
+        return
+    if not rows:
+        return
+    fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+    writer = csv.DictWriter(sys.stdout, fieldnames=fieldnames, delimiter='\t' if output_format == 'table' else ',')
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--db', default='datasets/datasets.sqlite')
+    common.add_argument('--format', choices=['table', 'csv', 'json'], default='table')
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    datasets = commands.add_parser('datasets', parents=[common], help='Datasets guardados')
+    datasets.add_argument('--since', help='Descargados desde esta fecha ISO')
+    rows = commands.add_parser('rows', parents=[common], help='Registros de un dataset')
+    rows.add_argument('dataset_id')
+    rows.add_argument('--where', action='append', default=[], metavar='CAMPO=VALOR')
+    rows.add_argument('--limit', type=int)
+    rows.add_argument('--offset', type=int, default=0)
+    args = parser.parse_args()
+
+    store = DatasetStore(args.db)
+    try:
+        if args.command == 'datasets':
+            print_rows(store.datasets(args.since), args.format)
+        else:
+            where = dict(condition.split('=', 1) for condition in args.where)
+            print_rows(store.rows(args.dataset_id, where, args.limit, args.offset), args.format)
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
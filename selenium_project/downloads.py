@@ -0,0 +1,337 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import Metrics
+
+CONTENT_TYPE_SCORES = (
+    ('csv', 30),
+    ('spreadsheet', 20),
+    ('excel', 20),
+    ('json', 10),
+    ('octet-stream', 5),
+    ('html', -50),
+)
+
+
+def score_link(candidate):
+    """Likelihood that a discovered link or button is the real data export."""
+    href = candidate.get('href', '').lower()
+    label = ' '.join(candidate.get(key, '') for key in ('title', 'aria_label', 'text', 'class_name')).lower()
+    if href.startswith(('javascript:', 'mailto:', 'tel:')):
+        return 0
+
+    score = 0
+    if 'rows.csv' in href or re.search(r'\.csv(\?|#|$)', href):
+        score += 40
+    elif re.search(r'\.xlsx?(\?|#|$)', href):
+        score += 30
+    elif re.search(r'\.json(\?|#|$)', href):
+        score += 15
+    if 'accesstype=download' in href or 'download' in href:
+        score += 15
+    if 'export' in href:
+        score += 10
+    if 'descargar' in label or 'download' in label:
+        score += 20
+    if 'export' in label:
+        score += 15
+    if 'csv' in label or 'excel' in label:
+        score += 10
+    return score
+
+
+def rank_download_candidates(candidates):
+    """Drop unlikely candidates and repeated links, best first (page order breaks ties)."""
+    seen = set()
+    scored = []
+    for candidate in candidates:
+        href = candidate.get('href')
+        if href:
+            if href in seen:
+                continue
+            seen.add(href)
+        score = score_link(candidate)
+        if score > 0:
+            scored.append((score, candidate))
+    scored.sort(key=lambda pair: pair[0], reverse=True)
+    return [candidate for _, candidate in scored]
+
+
+def resume_validator(response):
+    # If-Range only accepts strong ETags
+    etag = response.headers.get('etag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('last-modified')
+
+
+class DownloadCandidate:
+    def __init__(self, url, content_type='', size=None, accept_ranges=False, validator=None):
+        self.url = url
+        self.content_type = content_type
+        self.size = size
+        self.accept_ranges = accept_ranges
+        # Strong ETag or Last-Modified, sent as If-Range when resuming
+        self.validator = validator
+
+    @property
+    def score(self):
+        score = 0
+        for marker, points in CONTENT_TYPE_SCORES:
+            if marker in self.content_type:
+                score += points
+                break
+        url = self.url.lower()
+        if '.csv' in url:
+            score += 15
+        elif '.xlsx' in url or '.xls' in url:
+            score += 10
+        # An export is expected to be bigger than an error or landing page
+        if self.size:
+            score += min(self.size.bit_length(), 40) / 4
+        return score
+
+    @property
+    def extension(self):
+        url = self.url.lower()
+        content_type = self.content_type
+        if '.csv' in url or 'csv' in content_type:
+            return '.csv'
+        if '.xlsx' in url or 'excel' in content_type or 'spreadsheet' in content_type:
+            return '.xlsx'
+        if '.xls' in url:
+            return '.xls'
+        if 'json' in content_type:
+            return '.json'
+        return '.csv'
+
+
+class DownloadManager:
+    """Probes candidate links concurrently and downloads the best one.
+
+    Large files on servers that accept byte ranges are fetched as parallel
+    chunks; every transfer keeps a ``.part`` file (plus a journal with the
+    file's ETag or Last-Modified) so an interrupted download resumes where it
+    stopped, and only if the file did not change meanwhile. Finished files are
+    deduplicated by SHA-256 against earlier downloads in the same folder.
+    """
+
+    INDEX_FILENAME = '.content_index.json'
+
+    def __init__(self, folder, headers=None, workers=4, chunk_size=8 * 1024 * 1024,
+                 parallel_threshold=16 * 1024 * 1024, timeout=30, metrics=None):
+        self.folder = folder
+        self.metrics = metrics or Metrics()
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.parallel_threshold = parallel_threshold
+        self.timeout = timeout
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        # Sizes, byte ranges and resume offsets all refer to the bytes on the
+        # wire; a compressed response would be decoded by requests and match none of them
+        self.session.headers['Accept-Encoding'] = 'identity'
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def probe(self, url):
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+            if response.status_code in (403, 405, 501):
+                raise requests.HTTPError(response=response)
+            response.raise_for_status()
+            size = response.headers.get('content-length')
+            return DownloadCandidate(
+                response.url,
+                response.headers.get('content-type', '').lower(),
+                int(size) if size and size.isdigit() else None,
+                response.headers.get('accept-ranges', '').lower() == 'bytes',
+                resume_validator(response),
+            )
+        except requests.RequestException:
+            pass
+        # Servers that reject HEAD: ask for the first byte only
+        try:
+            with self.session.get(url, headers={'Range': 'bytes=0-0'}, stream=True,
+                                  timeout=self.timeout) as response:
+                response.raise_for_status()
+                content_range = response.headers.get('content-range', '')
+                match = re.search(r'/(\d+)$', content_range)
+                return DownloadCandidate(
+                    response.url,
+                    response.headers.get('content-type', '').lower(),
+                    int(match.group(1)) if match else None,
+                    response.status_code == 206,
+                    resume_validator(response),
+                )
+        except requests.RequestException:
+            return None
+
+    def rank(self, urls):
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.workers * 2, len(urls))) as executor:
+            candidates = [candidate for candidate in executor.map(self.probe, urls) if candidate]
+        return sorted(candidates, key=lambda candidate: candidate.score, reverse=True)
+
+    def download(self, candidate, basename):
+        """Download ``candidate`` to ``<folder>/<basename><ext>``; returns the final path."""
+        path = os.path.join(self.folder, basename + candidate.extension)
+        part_path = path + '.part'
+        started = time.perf_counter()
+        if candidate.accept_ranges and candidate.size and candidate.size >= self.parallel_threshold:
+            self.download_chunks(candidate, part_path)
+        else:
+            self.download_stream(candidate, part_path)
+        self.metrics.observe("file_download", time.perf_counter() - started)
+        self.metrics.inc("download_bytes_total", os.path.getsize(part_path))
+        if candidate.size and os.path.getsize(part_path) != candidate.size:
+            raise IOError(f'Descarga incompleta: {os.path.getsize(part_path)} de {candidate.size} bytes')
+        os.replace(part_path, path)
+        return self.deduplicate(path)
+
+    @staticmethod
+    def read_part_state(state_path):
+        try:
+            with open(state_path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Journals from before validators were recorded cannot be trusted
+        return state if isinstance(state, dict) else {}
+
+    @staticmethod
+    def write_part_state(state_path, state):
+        with open(state_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+
+    @staticmethod
+    def discard_part(part_path):
+        for path in (part_path, part_path + '.json'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def can_resume(self, candidate, part_path):
+        """A leftover .part is only reused if it was fetched from the same version of the file."""
+        if not (candidate.accept_ranges and candidate.validator and os.path.exists(part_path)):
+            return False
+        return self.read_part_state(part_path + '.json').get('validator') == candidate.validator
+
+    def download_stream(self, candidate, part_path):
+        state_path = part_path + '.json'
+        offset = 0
+        if self.can_resume(candidate, part_path):
+            offset = os.path.getsize(part_path)
+        else:
+            self.discard_part(part_path)
+        headers = {}
+        if offset:
+            # If-Range: the server sends the whole new file instead of a range of a changed one
+            headers.update({'Range': f'bytes={offset}-', 'If-Range': candidate.validator})
+        self.write_part_state(state_path, {'validator': candidate.validator})
+        with self.session.get(candidate.url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416:
+                # The .part already covers (or exceeds) the remote file: start over
+                print("Rango no satisfacible; se descarta la descarga parcial")
+                self.discard_part(part_path)
+                return self.download_stream(candidate, part_path)
+            response.raise_for_status()
+            resumed = response.status_code == 206 and response.headers.get(
+                'content-range', '').startswith(f'bytes {offset}-')
+            with open(part_path, 'ab' if resumed else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    f.write(chunk)
+        os.remove(state_path)
+
+    def download_chunks(self, candidate, part_path):
+        journal_path = part_path + '.json'
+        done = set()
+        if self.can_resume(candidate, part_path):
+            done = set(self.read_part_state(journal_path).get('done', []))
+        else:
+            self.discard_part(part_path)
+            with open(part_path, 'wb') as f:
+                f.truncate(candidate.size)
+            self.write_part_state(journal_path, {'validator': candidate.validator, 'done': []})
+
+        ranges = [(start, min(start + self.chunk_size, candidate.size) - 1)
+                  for start in range(0, candidate.size, self.chunk_size)]
+        lock = threading.Lock()
+
+        def fetch(index):
+            start, end = ranges[index]
+            headers = {'Range': f'bytes={start}-{end}'}
+            if candidate.validator:
+                headers['If-Range'] = candidate.validator
+            response = self.session.get(candidate.url, headers=headers, timeout=self.timeout)
+            if response.status_code == 416:
+                raise IOError(f'Rango {start}-{end} no satisfacible')
+            response.raise_for_status()
+            if response.status_code != 206 or len(response.content) != end - start + 1:
+                # A 200 to If-Range means the file changed since the first chunks
+                raise IOError(f'Rango {start}-{end} no soportado por el servidor o archivo modificado')
+            with open(part_path, 'r+b') as f:
+                f.seek(start)
+                f.write(response.content)
+            with lock:
+                done.add(index)
+                self.write_part_state(journal_path, {'validator': candidate.validator, 'done': sorted(done)})
+
+        pending = [index for index in range(len(ranges)) if index not in done]
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(fetch, pending))
+        except IOError:
+            # Mixing these chunks with a later version of the file would corrupt it
+            self.discard_part(part_path)
+            raise
+        os.remove(journal_path)
+
+    @staticmethod
+    def file_digest(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def deduplicate(self, path):
+        digest = self.file_digest(path)
+        basename = os.path.basename(path)
+
+        index_path = os.path.join(self.folder, self.INDEX_FILENAME)
+        index = {}
+        if os.path.exists(index_path):
+            with open(index_path, encoding='utf-8') as f:
+                index = json.load(f)
+
+        # The file was just rewritten: whatever was indexed under its name is gone
+        index = {key: name for key, name in index.items() if name != basename}
+
+        existing = index.get(digest)
+        if existing:
+            existing_path = os.path.join(self.folder, existing)
+            # The indexed file may have been replaced or edited since it was indexed
+            if os.path.exists(existing_path) and self.file_digest(existing_path) == digest:
+                os.remove(path)
+                print(f"Contenido idéntico a {existing}; no se guarda una copia nueva")
+                return existing_path
+
+        index[digest] = basename
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+        return path
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,112 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the per-stage latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class Metrics:
+    """Counters and per-stage latency histograms for one spider run.
+
+    Thread safe, so the API page workers and the download workers can share
+    it. Exported as JSON and Prometheus text, to files or over HTTP.
+    """
+
+    def __init__(self, prefix="datos_portal"):
+        self.prefix = prefix
+        self.counters = {}
+        self.stages = {}
+        self.lock = threading.Lock()
+
+    def inc(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = {'count': 0, 'sum': 0.0, 'buckets': [0] * len(BUCKETS)}
+            histogram['count'] += 1
+            histogram['sum'] += seconds
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    histogram['buckets'][i] += 1
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'counters': dict(self.counters),
+                'stages': {stage: {'count': histogram['count'], 'seconds': round(histogram['sum'], 6),
+                                   'buckets': dict(zip(map(str, BUCKETS), histogram['buckets']))}
+                           for stage, histogram in self.stages.items()},
+            }
+
+    def to_prometheus(self):
+        lines = []
+        with self.lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {self.prefix}_{name} counter")
+                lines.append(f"{self.prefix}_{name} {value}")
+            if self.stages:
+                name = f"{self.prefix}_stage_duration_seconds"
+                lines.append(f"# TYPE {name} histogram")
+                for stage, histogram in sorted(self.stages.items()):
+                    for bound, count in zip(BUCKETS, histogram['buckets']):
+                        lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram["count"]}')
+                    lines.append(f'{name}_sum{{stage="{stage}"}} {histogram["sum"]}')
+                    lines.append(f'{name}_count{{stage="{stage}"}} {histogram["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        return ", ".join(f"{stage} {histogram['sum']:.2f}s" for stage, histogram in self.stages.items())
+
+    def write(self, path):
+        """Write ``<path>.json`` and ``<path>.prom``."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path + ".json", 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        with open(path + ".prom", 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+
+    def serve(self, port, host="127.0.0.1"):
+        """Expose /metrics (Prometheus) and /metrics.json on a background thread; returns the server."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, content_type = metrics.to_prometheus(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, content_type = json.dumps(metrics.to_dict()), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                body = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
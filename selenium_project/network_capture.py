@@ -0,0 +1,137 @@
+import base64
+import json
+from urllib.parse import urlsplit
+
+# Chrome's Network.setBlockedURLs patterns: images, fonts, media and analytics
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*hotjar.com*", "*facebook.net*", "*newrelic.com*", "*nr-data.net*", "*segment.io*",
+]
+
+
+def enable_performance_log(chrome_options):
+    """Chrome only reports network events to get_log('performance') when asked at launch."""
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+def count_from_payload(payload):
+    """The total of a captured ``$select=count(*)`` response (``[{"count": "123"}]``), or None."""
+    if isinstance(payload, list) and len(payload) == 1 and isinstance(payload[0], dict) and len(payload[0]) == 1:
+        (key, value), = payload[0].items()
+        if 'count' in key.lower():
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def rows_from_payload(payload):
+    """Records in a captured JSON payload, as dicts, or None if it does not hold tabular data.
+
+    Understands plain SODA responses (a list of objects) and the portal's
+    rows.json format (``meta.view.columns`` plus ``data`` as lists).
+    """
+    if isinstance(payload, list) and payload and all(isinstance(row, dict) for row in payload):
+        return payload
+    if isinstance(payload, dict) and isinstance(payload.get('data'), list):
+        columns = payload.get('meta', {}).get('view', {}).get('columns')
+        if columns and all(isinstance(row, list) for row in payload['data']):
+            field_names = [column['fieldName'] for column in columns]
+            return [dict(zip(field_names, row)) for row in payload['data']]
+    return None
+
+
+class NetworkCapture:
+    """Blocks heavy resources and collects the JSON responses a page fetches, over CDP.
+
+    The driver must have been started with ``enable_performance_log``.
+    Performance log entries are consumed when read, so ``poll`` keeps the
+    responses seen so far.
+    """
+
+    def __init__(self, driver, blocked_urls=BLOCKED_URL_PATTERNS):
+        self.driver = driver
+        self.blocked_urls = blocked_urls
+        self.json_requests = {}
+        self.responses = []
+
+    def enable(self):
+        self.driver.execute_cdp_cmd('Network.enable', {})
+        self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.blocked_urls})
+        # Drop events from before capture started
+        self.driver.get_log('performance')
+
+    def poll(self):
+        for entry in self.driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            method = message.get('method')
+            params = message.get('params', {})
+            if method == 'Network.responseReceived':
+                response = params['response']
+                if 'json' in response.get('mimeType', '') and response.get('status') == 200:
+                    self.json_requests[params['requestId']] = response['url']
+            elif method == 'Network.loadingFinished' and params.get('requestId') in self.json_requests:
+                url = self.json_requests.pop(params['requestId'])
+                payload = self.response_body(params['requestId'])
+                if payload is not None:
+                    self.responses.append((url, payload))
+        return self.responses
+
+    def response_body(self, request_id):
+        try:
+            body = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            text = body['body']
+            if body.get('base64Encoded'):
+                text = base64.b64decode(text).decode('utf-8')
+            return json.loads(text)
+        except Exception:
+            # The body was evicted from Chrome's buffer or is not valid JSON
+            return None
+
+    def dataset_rows(self, dataset_id=None):
+        """Rows of the endpoint that returned the most records.
+
+        Grids fetch their data page by page, so payloads from the same
+        endpoint are merged, dropping rows repeated by ``:id``. With
+        ``dataset_id`` only endpoints whose URL names that dataset count, so
+        unrelated JSON (catalog, related views) is never taken for the data.
+        """
+        endpoints = {}
+        for url, payload in self.poll():
+            if dataset_id and dataset_id not in url:
+                continue
+            if count_from_payload(payload) is not None:
+                continue
+            rows = rows_from_payload(payload)
+            if rows:
+                parts = urlsplit(url)
+                endpoints.setdefault(parts.netloc + parts.path, []).append(rows)
+        if not endpoints:
+            return None, []
+
+        endpoint, pages = max(endpoints.items(), key=lambda item: sum(len(rows) for rows in item[1]))
+        seen_ids = set()
+        merged = []
+        for rows in pages:
+            for row in rows:
+                row_id = row.get(':id') or row.get(':sid')
+                if row_id is not None:
+                    if row_id in seen_ids:
+                        continue
+                    seen_ids.add(row_id)
+                merged.append(row)
+        return endpoint, merged
+
+    def row_count(self, dataset_id=None):
+        """The dataset's total as reported by a count query the page made, or None."""
+        for url, payload in self.poll():
+            if dataset_id and dataset_id not in url:
+                continue
+            count = count_from_payload(payload)
+            if count is not None:
+                return count
+        return None
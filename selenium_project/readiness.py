@@ -0,0 +1,100 @@
+import os
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Suffixes Chrome (and other browsers) use for downloads still in progress
+PARTIAL_DOWNLOAD_SUFFIXES = ('.crdownload', '.part', '.tmp')
+
+# Resource loads counted by a PerformanceObserver installed on the first call:
+# getEntriesByType('resource') stops growing once the timing buffer (250
+# entries by default) is full, which would make a busy page look idle.
+RESOURCE_COUNT_SCRIPT = """
+if (window.__readinessLoads === undefined) {
+    window.__readinessLoads = performance.getEntriesByType('resource').length;
+    new PerformanceObserver((list) => {
+        window.__readinessLoads += list.getEntries().length;
+    }).observe({type: 'resource'});
+}
+return [document.readyState, window.__readinessLoads];
+"""
+
+
+class PageReadiness:
+    """Waits on concrete page conditions instead of fixed sleeps.
+
+    Every wait returns as soon as its condition holds (or False on timeout)
+    and is recorded in ``timings`` as ``(name, seconds, satisfied)``.
+    """
+
+    def __init__(self, driver, timeout=15, poll_frequency=0.2, metrics=None):
+        self.driver = driver
+        self.timeout = timeout
+        self.poll_frequency = poll_frequency
+        self.metrics = metrics
+        self.timings = []
+
+    def wait(self, name, condition, timeout=None):
+        started = time.monotonic()
+        try:
+            result = WebDriverWait(self.driver, timeout or self.timeout, self.poll_frequency).until(condition)
+            satisfied = True
+        except TimeoutException:
+            result = None
+            satisfied = False
+        elapsed = time.monotonic() - started
+        self.timings.append((name, elapsed, satisfied))
+        if self.metrics:
+            self.metrics.observe("page_wait", elapsed)
+        return result if satisfied else False
+
+    def element_present(self, selectors, timeout=None):
+        """Wait until any of the CSS selectors matches; returns the first element found."""
+        def condition(driver):
+            for selector in selectors:
+                elements = driver.find_elements(By.CSS_SELECTOR, selector)
+                if elements:
+                    return elements[0]
+            return False
+        return self.wait(f"element:{selectors[0]}", condition, timeout)
+
+    def network_idle(self, idle_time=0.5, timeout=None):
+        """Wait for document.readyState == 'complete' and no new resource loads for ``idle_time`` seconds."""
+        state = {'count': -1, 'since': time.monotonic()}
+
+        def condition(driver):
+            ready_state, resource_count = driver.execute_script(RESOURCE_COUNT_SCRIPT)
+            now = time.monotonic()
+            if ready_state != 'complete' or resource_count != state['count']:
+                state['count'] = resource_count
+                state['since'] = now
+                return False
+            return now - state['since'] >= idle_time
+        return self.wait("network_idle", condition, timeout)
+
+    def download_complete(self, folder, existing_files, timeout=None):
+        """Wait for a new file in ``folder`` that is no longer partial and whose size has settled."""
+        sizes = {}
+
+        def condition(driver):
+            if not os.path.isdir(folder):
+                return False
+            for name in os.listdir(folder):
+                if name in existing_files or name.endswith(PARTIAL_DOWNLOAD_SUFFIXES):
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    # Renamed or removed by the browser between listdir and getsize
+                    continue
+                if size and sizes.get(name) == size:
+                    return path
+                sizes[name] = size
+            return False
+        return self.wait("download", condition, timeout)
+
+    def summary(self):
+        return ", ".join(f"{name}={seconds:.2f}s{'' if ok else ' (timeout)'}" for name, seconds, ok in self.timings)
@@ -1,42 +1,167 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import csv
 import time
+IMPORT_STARTED = time.perf_counter()
+
+import csv
 import re
 import os
 import requests
 import json
-from urllib.parse import urljoin
+from datetime import timedelta
+
+# Selenium, webdriver_manager and pyarrow are imported where they are used,
+# so API-only runs never load them
+from browser_pool import BrowserPool
+from browser_scripts import (DOWNLOAD_CANDIDATES_SCRIPT, GRID_EXTRACT_SCRIPT, NEXT_PAGE_SCRIPT,
+                             TABLE_EXTRACT_SCRIPT)
+from chromedriver import download_chromedriver, resolve_chromedriver
+from dataset_store import DatasetStore
+from downloads import DownloadManager, rank_download_candidates
+from metrics import Metrics
+from network_capture import NetworkCapture, enable_performance_log
+from soda_client import SodaClient
+from sync import DatasetMirror
+
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+
+DEFAULT_DATASET_ID = "ie2a-j7h9"
+
+# Enhanced headers to avoid 403
+API_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Cache-Control': 'max-age=0',
+    'Referer': 'https://www.datos.gov.co/',
+    'Origin': 'https://www.datos.gov.co'
+}
+
+def csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return '' if value is None else value
 
 class ColombiaDataPortalSpider:
-    def __init__(self):
-        self.api_url = "https://www.datos.gov.co/api/v3/views/ie2a-j7h9/query.json"
-        self.web_url = "https://www.datos.gov.co/Funci-n-p-blica/Activos-de-Informaci-n-Alcald-a-de-Mistrat-/ie2a-j7h9/about_data"
+    def __init__(self, dataset_id=DEFAULT_DATASET_ID, web_url=None, browser_pool=None):
+        self.base_url = "https://www.datos.gov.co"
+        self.dataset_id = dataset_id
+        self.api_url = f"{self.base_url}/resource/{self.dataset_id}.json"
+        if web_url:
+            self.web_url = web_url
+        elif dataset_id == DEFAULT_DATASET_ID:
+            self.web_url = "https://www.datos.gov.co/Funci-n-p-blica/Activos-de-Informaci-n-Alcald-a-de-Mistrat-/ie2a-j7h9/about_data"
+        else:
+            # The portal redirects /d/<id> to the dataset's page
+            self.web_url = f"{self.base_url}/d/{dataset_id}"
+        self.default_title = "Activos-de-Informacion-Alcaldia-de-Mistrat" if dataset_id == DEFAULT_DATASET_ID else dataset_id
         self.driver = None
+        # Optional BrowserPool; when set, drivers are leased instead of launched
+        self.browser_pool = browser_pool
+        self.pooled_browser = None
+        self.headless = True
         self.datasets_folder = "datasets"
-        self.wait = None
+        self.readiness = None
+        # Upper bounds for condition waits; they return as soon as the condition holds
+        self.page_timeout = 15
+        self.download_timeout = 60
+        # Upper bound on pages followed in paginated data grids
+        self.max_table_pages = 200
+        # Rows per API page and number of pages fetched concurrently
+        self.api_page_size = 50000
+        self.api_workers = 4
+        # Decode the API response incrementally instead of fetching pages concurrently
+        self.stream_api = False
+        # Extra typed columnar copy of API downloads: None, 'parquet' or 'arrow'
+        self.columnar_format = None
+        # When False, a failed API download returns False instead of opening the web page
+        self.web_fallback = True
+        # Keep a local SQLite mirror updated with only the rows changed since the
+        # last run; every full_sync_days it is fully reconciled with the portal
+        self.sync_mode = False
+        self.full_sync_days = 7
+        # Optional SQLite database (see dataset_store.py) that also receives the rows
+        self.store_path = None
+        # Web fallback blocks images, fonts, media and analytics and saves the
+        # JSON the page fetches (over CDP) before resorting to the DOM
+        self.network_capture = False
+        self.capture = None
+        # Result of the last download, used for batch manifests
+        self.downloaded_files = []
+        self.rows_downloaded = None
+        self.metadata = None
+        # Per-stage timings and counters; written to <metrics_path>.json/.prom
+        # after run() and served on metrics_port while it runs
+        self.metrics = Metrics()
+        self.metrics_path = None
+        self.metrics_port = None
         
+    def build_driver(self):
+        with self.metrics.timer("selenium_import"):
+            from selenium import webdriver
+            from selenium.webdriver.chrome.service import Service
+        
+        chrome_options = webdriver.ChromeOptions()
+        if self.headless:
+            chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        chrome_options.add_experimental_option('useAutomationExtension', False)
+        # Button downloads land next to the other datasets so they can be detected
+        chrome_options.add_experimental_option('prefs', {
+            'download.default_directory': os.path.abspath(self.datasets_folder),
+            'download.prompt_for_download': False,
+        })
+        if self.network_capture:
+            enable_performance_log(chrome_options)
+        
+        # Resolved locally when possible; see chromedriver.py
+        with self.metrics.timer("driver_resolve"):
+            driver_path, source = resolve_chromedriver()
+        print(f"Chromedriver ({source}): {driver_path}")
+        
+        try:
+            with self.metrics.timer("browser_launch"):
+                driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+        except Exception as e:
+            # An explicit CHROMEDRIVER_PATH is respected; a webdriver_manager driver is already current
+            if source not in ("caché local", "PATH"):
+                raise
+            # Usually Chrome updated and the reused driver no longer matches it
+            print(f"No se pudo iniciar Chrome con {driver_path} ({e}); se descarga un chromedriver actualizado")
+            with self.metrics.timer("driver_resolve"):
+                driver_path = download_chromedriver()
+            print(f"Chromedriver (webdriver_manager): {driver_path}")
+            with self.metrics.timer("browser_launch"):
+                driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        return driver
+    
     def setup_driver(self):
         try:
-            chrome_options = webdriver.ChromeOptions()
-            # chrome_options.add_argument("--headless")  # Commented out for debugging
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_argument("--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            # Setup WebDriverWait
-            self.wait = WebDriverWait(self.driver, 15)
+            from readiness import PageReadiness
+            
+            if self.browser_pool:
+                with self.metrics.timer("driver_setup"):
+                    self.pooled_browser = self.browser_pool.acquire(download_dir=self.datasets_folder)
+                self.driver = self.pooled_browser.driver
+            else:
+                with self.metrics.timer("driver_setup"):
+                    self.driver = self.build_driver()
+            
+            self.driver.set_script_timeout(120)
+            self.readiness = PageReadiness(self.driver, timeout=self.page_timeout, metrics=self.metrics)
+            if self.network_capture:
+                # Before the first navigation, so blocking applies to the whole page load
+                self.capture = NetworkCapture(self.driver)
+                self.capture.enable()
             
             return True
             
@@ -60,19 +185,22 @@ class ColombiaDataPortalSpider:
             print(f"Navegando a la página web: {self.web_url}")
             self.driver.get(self.web_url)
             
-            # Wait for page to load completely
-            time.sleep(10)
+            # Try multiple selectors for the title
+            title_selectors = [
+                'h1',
+                'h2', 
+                '.dataset-title',
+                '.page-title',
+                '[data-testid="title"]',
+                '.title'
+            ]
+            
+            # Wait until the page stops loading resources and a title candidate exists
+            self.readiness.network_idle()
+            self.readiness.element_present(title_selectors)
             
             try:
-                # Try multiple selectors for the title
-                title_selectors = [
-                    'h1',
-                    'h2', 
-                    '.dataset-title',
-                    '.page-title',
-                    '[data-testid="title"]',
-                    '.title'
-                ]
+                from selenium.webdriver.common.by import By
                 
                 title = None
                 for selector in title_selectors:
@@ -88,79 +216,64 @@ class ColombiaDataPortalSpider:
                     # Try to get title from URL or page metadata
                     title = self.driver.title
                     if not title or title == "Datos.gov.co":
-                        title = "Activos-de-Informacion-Alcaldia-de-Mistrat"
+                        title = self.default_title
                 
                 print(f"Dataset encontrado: {title}")
                 return title
                 
             except Exception as e:
                 print(f"Error obteniendo título: {e}")
-                return "Activos-de-Informacion-Alcaldia-de-Mistrat"
+                return self.default_title
             
         except Exception as e:
             print(f"Error obteniendo información de la web: {e}")
-            return "Activos-de-Informacion-Alcaldia-de-Mistrat"
+            return self.default_title
+    
+    def create_soda_client(self):
+        return SodaClient(self.base_url, self.dataset_id, headers=API_HEADERS,
+                          page_size=self.api_page_size, max_workers=self.api_workers, metrics=self.metrics)
+    
+    def get_metadata(self, client):
+        # Fetched once per dataset and shared by the title lookup and the download
+        if self.metadata is None:
+            try:
+                with self.metrics.timer("metadata"):
+                    self.metadata = client.get_metadata()
+            except (requests.RequestException, ValueError) as e:
+                print(f"No se pudieron obtener los metadatos del dataset: {e}")
+                self.metadata = {}
+        return self.metadata
+    
+    def get_dataset_info_from_api(self):
+        client = self.create_soda_client()
+        try:
+            title = self.get_metadata(client).get('name') or self.default_title
+            print(f"Dataset encontrado: {title}")
+            return title
+        finally:
+            client.close()
     
     def download_dataset_from_api(self, dataset_title):
+        client = None
         try:
             print(f"Intentando descargar dataset desde la API: {self.api_url}")
             
-            # Enhanced headers to avoid 403
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'application/json, text/plain, */*',
-                'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Cache-Control': 'max-age=0',
-                'Referer': 'https://www.datos.gov.co/',
-                'Origin': 'https://www.datos.gov.co'
-            }
-            
-            # First try with GET request
-            response = requests.get(self.api_url, headers=headers, timeout=30)
-            
-            if response.status_code == 403:
-                print("Acceso denegado con GET. Intentando con POST...")
-                # Try POST request with different approach
-                post_data = {
-                    "query": "SELECT * LIMIT 1000"
-                }
-                response = requests.post(self.api_url, headers=headers, json=post_data, timeout=30)
-            
-            if response.status_code == 403:
-                print("Acceso denegado también con POST. Intentando método alternativo...")
-                return self.download_dataset_from_web(dataset_title)
-            
-            response.raise_for_status()
-            
-            try:
-                data = response.json()
-            except json.JSONDecodeError:
-                print("Respuesta no es JSON válido. Intentando método alternativo...")
-                return self.download_dataset_from_web(dataset_title)
+            client = self.create_soda_client()
+            metadata = self.get_metadata(client)
             
-            if 'data' not in data or not data['data']:
+            with self.metrics.timer("count"):
+                total_rows = client.count_rows()
+            if not total_rows:
                 print("No se encontraron datos en la respuesta de la API")
-                return self.download_dataset_from_web(dataset_title)
+                return self.fallback_to_web(dataset_title)
             
-            dataset_data = data['data']
-            print(f"Datos obtenidos de la API: {len(dataset_data)} registros")
+            pages = (total_rows + self.api_page_size - 1) // self.api_page_size
+            print(f"Registros en la API: {total_rows} ({pages} páginas de {self.api_page_size}, {self.api_workers} workers)")
             
-            # Get column names
-            if 'meta' in data and 'view' in data['meta'] and 'columns' in data['meta']['view']:
-                columns = [col['name'] for col in data['meta']['view']['columns']]
-            else:
-                # Try to infer columns from first row
-                if dataset_data and len(dataset_data) > 0:
-                    columns = [f"Columna_{i}" for i in range(len(dataset_data[0]))]
-                else:
-                    print("No se pueden determinar las columnas")
-                    return self.download_dataset_from_web(dataset_title)
+            # Get column names; system columns (':id', ':updated_at', ...) are skipped
+            columns = [col for col in metadata.get('columns', []) if not col['fieldName'].startswith(':')]
+            field_names = [col['fieldName'] for col in columns]
+            column_names = [col['name'] for col in columns]
             
             # Save as CSV
             safe_title = re.sub(r'[^\w\s-]', '', dataset_title).strip()
@@ -169,28 +282,186 @@ class ColombiaDataPortalSpider:
             csv_filename = f"{safe_title}_API.csv"
             csv_filepath = os.path.join(self.datasets_folder, csv_filename)
             
-            with open(csv_filepath, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(columns)
-                for row in dataset_data:
-                    writer.writerow(row)
+            jsonl_filename = f"{safe_title}_API.jsonl"
+            jsonl_filepath = os.path.join(self.datasets_folder, jsonl_filename)
             
+            if self.stream_api:
+                rows = client.stream_rows(total_rows)
+            else:
+                rows = (row for page in client.iter_pages(total_rows) for row in page)
+            
+            columnar_writer = None
+            columnar_filename = f"{safe_title}_API.{self.columnar_format}" if self.columnar_format else None
+            
+            # Rows are written to CSV and JSON Lines as they arrive, never held all at once.
+            # Without metadata the columns are only known once every row is in (SODA leaves
+            # out null fields, so no single row has them all): the CSV and columnar files
+            # are then written from the JSON Lines file in a second pass
+            infer_columns = not field_names
+            inferred_fields = {}
+            row_count = 0
+            write_seconds = 0.0
+            transfer_started = time.perf_counter()
+            try:
+                with open(csv_filepath, 'w', newline='', encoding='utf-8') as csvfile, \
+                        open(jsonl_filepath, 'w', encoding='utf-8') as jsonlfile:
+                    writer = csv.writer(csvfile)
+                    for row in rows:
+                        write_started = time.perf_counter()
+                        if infer_columns:
+                            inferred_fields.update(dict.fromkeys(row))
+                        else:
+                            if not row_count:
+                                writer.writerow(column_names)
+                                columnar_writer = self.create_columnar_writer(columnar_filename, columns)
+                            writer.writerow([csv_value(row.get(field)) for field in field_names])
+                            if columnar_writer:
+                                columnar_writer.write_row(row)
+                        jsonlfile.write(json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n')
+                        row_count += 1
+                        write_seconds += time.perf_counter() - write_started
+                    
+                    if infer_columns and row_count:
+                        write_started = time.perf_counter()
+                        jsonlfile.flush()
+                        field_names = column_names = list(inferred_fields)
+                        columns = [{'fieldName': name, 'name': name} for name in field_names]
+                        writer.writerow(column_names)
+                        columnar_writer = self.create_columnar_writer(columnar_filename, columns)
+                        with open(jsonl_filepath, encoding='utf-8') as written:
+                            for line in written:
+                                row = json.loads(line)
+                                writer.writerow([csv_value(row.get(field)) for field in field_names])
+                                if columnar_writer:
+                                    columnar_writer.write_row(row)
+                        write_seconds += time.perf_counter() - write_started
+            finally:
+                if columnar_writer:
+                    columnar_writer.close()
+                # The transfer stage covers fetching and decoding; writing is reported apart
+                self.metrics.observe("api_transfer", time.perf_counter() - transfer_started - write_seconds)
+                self.metrics.observe("write", write_seconds)
+                self.metrics.inc("rows_total", row_count)
+            
+            print(f"Datos obtenidos de la API: {row_count} registros")
             print(f"Dataset guardado como CSV desde API: {csv_filename}")
-            
-            # Save as JSON
-            json_filename = f"{safe_title}_API.json"
-            json_filepath = os.path.join(self.datasets_folder, json_filename)
-            
-            with open(json_filepath, 'w', encoding='utf-8') as jsonfile:
-                json.dump(data, jsonfile, indent=2, ensure_ascii=False)
-            
-            print(f"Dataset guardado como JSON desde API: {json_filename}")
-            
-            return True
+            print(f"Dataset guardado como JSON Lines desde API: {jsonl_filename}")
+            if columnar_writer:
+                print(f"Dataset guardado en formato columnar desde API: {columnar_filename}")
+            
+            self.rows_downloaded = row_count
+            self.downloaded_files.extend([csv_filepath, jsonl_filepath])
+            if columnar_writer:
+                self.downloaded_files.append(os.path.join(self.datasets_folder, columnar_filename))
+            
+            if metadata:
+                meta_filepath = os.path.join(self.datasets_folder, f"{safe_title}_API_meta.json")
+                with open(meta_filepath, 'w', encoding='utf-8') as metafile:
+                    json.dump(metadata, metafile, ensure_ascii=False)
+                self.downloaded_files.append(meta_filepath)
+            
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 403:
+                print("Acceso denegado por la API. Intentando método alternativo...")
+            else:
+                print(f"Error descargando desde la API: {e}")
+            return self.fallback_to_web(dataset_title)
             
         except Exception as e:
             print(f"Error descargando desde la API: {e}")
             print("Intentando descarga desde la página web...")
+            return self.fallback_to_web(dataset_title)
+        
+        finally:
+            if client:
+                client.close()
+        
+        # Outside the try above: the download is complete, a store error must not send it to the web fallback
+        if self.store_path:
+            with open(jsonl_filepath, encoding='utf-8') as jsonlfile:
+                self.store_rows(dataset_title, 'api', (json.loads(line) for line in jsonlfile))
+        return True
+    
+    def create_columnar_writer(self, columnar_filename, columns):
+        if not columnar_filename:
+            return None
+        from columnar import ColumnarDatasetWriter
+        return ColumnarDatasetWriter(os.path.join(self.datasets_folder, columnar_filename), columns,
+                                     file_format=self.columnar_format)
+    
+    def sync_dataset_from_api(self, dataset_title):
+        client = None
+        mirror = None
+        try:
+            safe_title = re.sub(r'[^\w\s-]', '', dataset_title).strip()
+            safe_title = re.sub(r'[-\s]+', '-', safe_title)
+            mirror_filepath = os.path.join(self.datasets_folder, f"{safe_title}_API.sqlite")
+            print(f"Sincronizando dataset desde la API en: {mirror_filepath}")
+            
+            client = self.create_soda_client()
+            metadata = self.get_metadata(client)
+            mirror = DatasetMirror(mirror_filepath, full_sync_interval=timedelta(days=self.full_sync_days))
+            
+            with self.metrics.timer("sync"):
+                result = mirror.sync(client)
+            print(f"Sincronización {result['mode']}: {result['upserted']} registros actualizados, "
+                  f"{result['deleted']} eliminados, {result['rows']} en total")
+            self.metrics.inc("rows_total", result['upserted'])
+            
+            # The CSV is regenerated from the mirror so it always holds the whole dataset
+            columns = [col for col in metadata.get('columns', []) if not col['fieldName'].startswith(':')]
+            field_names = [col['fieldName'] for col in columns]
+            column_names = [col['name'] for col in columns]
+            if not field_names:
+                # SODA leaves out null fields, so the columns are those of every row together
+                inferred_fields = {}
+                for row in mirror.iter_rows():
+                    inferred_fields.update(dict.fromkeys(key for key in row if not key.startswith(':')))
+                field_names = column_names = list(inferred_fields)
+            csv_filepath = os.path.join(self.datasets_folder, f"{safe_title}_API.csv")
+            with open(csv_filepath, 'w', newline='', encoding='utf-8') as csvfile:
+                writer = csv.writer(csvfile)
+                for i, row in enumerate(mirror.iter_rows()):
+                    if not i:
+                        writer.writerow(column_names)
+                    writer.writerow([csv_value(row.get(field)) for field in field_names])
+            
+            print(f"Dataset guardado como CSV desde la copia local: {os.path.basename(csv_filepath)}")
+            self.rows_downloaded = result['rows']
+            self.downloaded_files.extend([mirror_filepath, csv_filepath])
+            
+        except Exception as e:
+            print(f"Error sincronizando desde la API: {e}")
+            print("Intentando descarga completa...")
+            if mirror:
+                mirror.close()
+                mirror = None
+            return self.download_dataset_from_api(dataset_title)
+        
+        finally:
+            if client:
+                client.close()
+        
+        # Outside the try above: a store error is not a sync failure
+        try:
+            if self.store_path:
+                self.store_rows(dataset_title, 'sync', mirror.iter_rows())
+        finally:
+            mirror.close()
+        return True
+    
+    def fallback_to_web(self, dataset_title):
+        if not self.web_fallback:
+            return False
+        self.metrics.inc("web_fallbacks_total")
+        # Chrome is only started once the API path has failed
+        if not self.driver:
+            if not self.setup_driver():
+                print("Error: No se pudo configurar el driver de Chrome")
+                return False
+            with self.metrics.timer("page_load"):
+                self.get_dataset_info_from_web()
+        with self.metrics.timer("web_download"):
             return self.download_dataset_from_web(dataset_title)
     
     def download_dataset_from_web(self, dataset_title):
@@ -198,7 +469,12 @@ class ColombiaDataPortalSpider:
             print("Intentando descargar dataset desde la página web...")
             
             # Wait for page to be fully loaded
-            time.sleep(5)
+            self.readiness.network_idle()
+            
+            if self.capture:
+                with self.metrics.timer("network_capture"):
+                    if self.save_captured_dataset(dataset_title):
+                        return True
             
             # First, let's try to find the data table or view
             print("Buscando tabla de datos o vista de datos...")
@@ -210,15 +486,20 @@ class ColombiaDataPortalSpider:
                 '.dataset-table',
                 '[data-testid="data-table"]',
                 '.table-responsive table',
-                '.data-view table'
+                '.data-view table',
+                '[role="grid"]'
             ]
             
+            from selenium.webdriver.common.by import By
+            
             data_table = None
+            data_selector = None
             for selector in table_selectors:
                 try:
                     table = self.driver.find_element(By.CSS_SELECTOR, selector)
                     if table:
                         data_table = table
+                        data_selector = selector
                         print(f"Tabla de datos encontrada con selector: {selector}")
                         break
                 except:
@@ -226,90 +507,43 @@ class ColombiaDataPortalSpider:
             
             if data_table:
                 print("Extrayendo datos de la tabla...")
-                return self.extract_data_from_table(data_table, dataset_title)
+                with self.metrics.timer("table_extraction"):
+                    return self.extract_data_from_table(data_table, dataset_title, data_selector)
             
             # If no table found, look for download links
             print("No se encontró tabla de datos. Buscando enlaces de descarga...")
             
-            # Look for download links with multiple strategies
-            download_selectors = [
-                'a[href*=".csv"]',
-                'a[href*=".xlsx"]', 
-                'a[href*=".xls"]',
-                'a[href*="download"]',
-                'a[href*="export"]',
-                'button[class*="download"]',
-                'a[class*="download"]',
-                'a[title*="descargar"]',
-                'a[title*="download"]',
-                'a[aria-label*="descargar"]',
-                'a[aria-label*="download"]'
-            ]
-            
-            download_elements = []
-            for selector in download_selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    download_elements.extend(elements)
-                except:
-                    continue
+            # All links and buttons come back from one in-browser query and are ranked here
+            candidates = rank_download_candidates(self.driver.execute_script(DOWNLOAD_CANDIDATES_SCRIPT))
             
-            # Remove duplicates
-            download_elements = list(set(download_elements))
-            
-            if not download_elements:
-                print("No se encontraron enlaces de descarga. Buscando en toda la página...")
-                # Search for any links that might contain file extensions
-                all_links = self.driver.find_elements(By.TAG_NAME, "a")
-                for link in all_links:
-                    try:
-                        href = link.get_attribute('href')
-                        if href and any(ext in href.lower() for ext in ['.csv', '.xlsx', '.xls', 'download', 'export']):
-                            download_elements.append(link)
-                    except:
-                        continue
-            
-            if not download_elements:
+            if not candidates:
                 print("No se encontraron elementos de descarga en la página web")
                 return False
             
-            print(f"Encontrados {len(download_elements)} elementos de descarga")
+            print(f"Encontrados {len(candidates)} elementos de descarga")
             
-            # Try each download element
-            for i, element in enumerate(download_elements):
+            # Links are probed together and tried best-first; buttons are clicked afterwards
+            link_urls = [candidate['href'] for candidate in candidates if candidate['tag'] == 'a' and candidate['href']]
+            buttons = [candidate['element'] for candidate in candidates if candidate['tag'] == 'button']
+            
+            if link_urls and self.download_best_link(link_urls, dataset_title):
+                return True
+            
+            for i, element in enumerate(buttons):
+                print(f"Haciendo clic en botón de descarga {i+1}/{len(buttons)}...")
                 try:
-                    print(f"Intentando descarga {i+1}/{len(download_elements)}")
-                    
-                    if element.tag_name == 'a':
-                        href = element.get_attribute('href')
-                        if href:
-                            if href.startswith('http'):
-                                print(f"Enlace directo encontrado: {href}")
-                                if self.download_file_from_url(href, dataset_title, i):
-                                    return True
-                            else:
-                                # Relative URL, make it absolute
-                                absolute_url = urljoin(self.web_url, href)
-                                print(f"Enlace relativo convertido: {absolute_url}")
-                                if self.download_file_from_url(absolute_url, dataset_title, i):
-                                    return True
+                    existing_files = set(os.listdir(self.datasets_folder))
+                    element.click()
                     
-                    elif element.tag_name == 'button':
-                        print("Haciendo clic en botón de descarga...")
-                        try:
-                            element.click()
-                            time.sleep(5)
-                            
-                            # Check if download started
-                            if self.check_download_folder():
-                                print("Descarga exitosa mediante clic en botón")
-                                return True
-                        except Exception as click_error:
-                            print(f"Error al hacer clic: {click_error}")
-                            continue
-                
-                except Exception as e:
-                    print(f"Error con elemento {i+1}: {e}")
+                    # Wait for a new, fully written file in the datasets folder
+                    downloaded = self.readiness.download_complete(
+                        self.datasets_folder, existing_files, timeout=self.download_timeout)
+                    if downloaded:
+                        print(f"Descarga exitosa mediante clic en botón: {os.path.basename(downloaded)}")
+                        self.downloaded_files.append(downloaded)
+                        return True
+                except Exception as click_error:
+                    print(f"Error al hacer clic: {click_error}")
                     continue
             
             print("No se pudo descargar desde ningún elemento")
@@ -319,52 +553,111 @@ class ColombiaDataPortalSpider:
             print(f"Error en descarga desde web: {e}")
             return False
     
-    def extract_data_from_table(self, table, dataset_title):
-        """Extract data from HTML table and save as CSV"""
+    def save_captured_dataset(self, dataset_title):
+        """Save the records from the JSON responses the page loaded, if they hold the whole dataset.
+        
+        Pages usually load only a preview or the first grid page; unless the
+        captured rows reach the dataset's row count, nothing is saved and the
+        table and download paths run instead.
+        """
+        endpoint, rows = self.capture.dataset_rows(self.dataset_id)
+        if not rows:
+            print("No se capturaron respuestas JSON con datos")
+            return False
+        print(f"Capturados {len(rows)} registros desde {endpoint}")
+        
+        expected_rows = self.expected_row_count()
+        if expected_rows is None:
+            print("No se pudo saber cuántos registros tiene el dataset; no se usa la captura")
+            return False
+        if len(rows) < expected_rows:
+            print(f"Captura incompleta ({len(rows)} de {expected_rows} registros); se intenta con la tabla y las descargas")
+            return False
+        
+        safe_title = re.sub(r'[^\w\s-]', '', dataset_title).strip()
+        safe_title = re.sub(r'[-\s]+', '-', safe_title)
+        csv_filepath = os.path.join(self.datasets_folder, f"{safe_title}_red.csv")
+        jsonl_filepath = os.path.join(self.datasets_folder, f"{safe_title}_red.jsonl")
+        
+        # System columns (':id', ':sid', ...) stay in the JSON Lines copy only
+        field_names = [key for key in dict.fromkeys(key for row in rows for key in row) if not key.startswith(':')]
+        with open(csv_filepath, 'w', newline='', encoding='utf-8') as csvfile, \
+                open(jsonl_filepath, 'w', encoding='utf-8') as jsonlfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(field_names)
+            for row in rows:
+                writer.writerow([csv_value(row.get(field)) for field in field_names])
+                jsonlfile.write(json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n')
+        
+        print(f"Dataset guardado desde la red como CSV y JSON Lines: {os.path.basename(csv_filepath)}")
+        self.rows_downloaded = len(rows)
+        self.metrics.inc("rows_total", len(rows))
+        self.downloaded_files.extend([csv_filepath, jsonl_filepath])
+        if self.store_path:
+            self.store_rows(dataset_title, 'network', rows)
+        return True
+    
+    def expected_row_count(self):
+        """Row count from a count query the page made, else from the API; None if neither is available"""
+        count = self.capture.row_count(self.dataset_id)
+        if count is not None:
+            return count
+        client = None
+        try:
+            client = self.create_soda_client()
+            with self.metrics.timer("count"):
+                return client.count_rows()
+        except Exception as e:
+            print(f"No se pudo consultar el total de registros en la API: {e}")
+            return None
+        finally:
+            if client:
+                client.close()
+    
+    def extract_data_from_table(self, table, dataset_title, selector=None):
+        """Extract data from HTML table or data grid and save as CSV"""
         try:
             print("Extrayendo datos de la tabla HTML...")
+            from selenium.common.exceptions import WebDriverException
+            from selenium.webdriver.common.by import By
+            
+            # Headers and rows come back from a single in-browser script call
+            headers, rows = self.read_table(table)
+            
+            # Paginated grids: follow the "next" control and append every page
+            page_rows = list(rows)
+            for page in range(2, self.max_table_pages + 1):
+                if not selector:
+                    break
+                next_button = self.driver.execute_script(NEXT_PAGE_SCRIPT)
+                if not next_button:
+                    break
+                next_button.click()
+                previous_rows = page_rows
+                
+                def page_changed(driver):
+                    try:
+                        _, current_rows = self.read_table(driver.find_element(By.CSS_SELECTOR, selector))
+                    except WebDriverException:
+                        # The grid is being re-rendered
+                        return False
+                    return current_rows if current_rows and current_rows != previous_rows else False
+                
+                page_rows = self.readiness.wait(f"table_page_{page}", page_changed)
+                if not page_rows:
+                    break
+                rows.extend(page_rows)
             
-            # Get headers
-            headers = []
-            try:
-                header_row = table.find_element(By.TAG_NAME, "thead").find_elements(By.TAG_NAME, "th")
-                headers = [th.text.strip() for th in header_row if th.text.strip()]
-            except:
-                # Try to get headers from first row
-                try:
-                    first_row = table.find_element(By.TAG_NAME, "tbody").find_elements(By.TAG_NAME, "tr")[0]
-                    headers = [td.text.strip() for td in first_row.find_elements(By.TAG_NAME, "td") if td.text.strip()]
-                except:
-                    headers = []
-            
-            if not headers:
+            if not headers and rows:
                 # Generate generic headers
-                first_row = table.find_elements(By.TAG_NAME, "tr")[0]
-                headers = [f"Columna_{i+1}" for i in range(len(first_row.find_elements(By.TAG_NAME, "td")))]
-            
-            # Get data rows
-            rows = []
-            try:
-                tbody = table.find_element(By.TAG_NAME, "tbody")
-                data_rows = tbody.find_elements(By.TAG_NAME, "tr")
-            except:
-                # If no tbody, get all rows
-                data_rows = table.find_elements(By.TAG_NAME, "tr")[1:]  # Skip header row
-            
-            for row in data_rows:
-                try:
-                    cells = row.find_elements(By.TAG_NAME, "td")
-                    if cells:
-                        row_data = [cell.text.strip() for cell in cells]
-                        rows.append(row_data)
-                except:
-                    continue
+                headers = [f"Columna_{i+1}" for i in range(len(rows[0]))]
             
             if not rows:
                 print("No se encontraron filas de datos en la tabla")
                 return False
             
             print(f"Extraídos {len(rows)} filas de datos de la tabla")
+            self.metrics.inc("rows_total", len(rows))
             
             # Save as CSV
             safe_title = re.sub(r'[^\w\s-]', '', dataset_title).strip()
@@ -380,72 +673,94 @@ class ColombiaDataPortalSpider:
                     writer.writerow(row)
             
             print(f"Dataset extraído de tabla y guardado como CSV: {csv_filename}")
+            self.rows_downloaded = len(rows)
+            self.downloaded_files.append(csv_filepath)
+            if self.store_path:
+                self.store_rows(dataset_title, 'web', (dict(zip(headers, row)) for row in rows))
             return True
             
         except Exception as e:
             print(f"Error extrayendo datos de la tabla: {e}")
             return False
     
+    def read_table(self, table):
+        if table.tag_name == 'table':
+            payload = self.driver.execute_script(TABLE_EXTRACT_SCRIPT, table)
+        else:
+            # Virtualized grid: the script scrolls it to the end collecting rows
+            payload = self.driver.execute_async_script(GRID_EXTRACT_SCRIPT, table)
+        return payload['headers'], payload['rows']
+    
+    def store_rows(self, dataset_title, method, rows):
+        """Copy the rows to the SQLite store; errors are reported, not raised, since the files are already saved."""
+        store = None
+        try:
+            store = DatasetStore(self.store_path)
+            with self.metrics.timer("store"):
+                count = store.write_dataset(self.dataset_id, dataset_title, method, rows)
+            print(f"{count} registros guardados en la base de datos: {self.store_path}")
+            return True
+        except Exception as e:
+            self.metrics.inc("store_errors_total")
+            print(f"Error guardando en la base de datos {self.store_path}: {e}")
+            return False
+        finally:
+            if store:
+                store.close()
+    
+    def create_download_manager(self):
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+            'Referer': self.web_url
+        }
+        return DownloadManager(self.datasets_folder, headers=headers, metrics=self.metrics)
+    
+    def download_best_link(self, urls, dataset_title):
+        manager = self.create_download_manager()
+        try:
+            print(f"Evaluando {len(urls)} enlaces de descarga...")
+            candidates = manager.rank(urls)
+            for i, candidate in enumerate(candidates):
+                size = f"{candidate.size} bytes" if candidate.size else "tamaño desconocido"
+                print(f"Intentando descarga {i+1}/{len(candidates)}: {candidate.url} ({candidate.content_type or 'sin tipo'}, {size})")
+                if self.download_candidate(manager, candidate, dataset_title, i):
+                    return True
+            return False
+        finally:
+            manager.close()
+    
     def download_file_from_url(self, url, dataset_title, index):
+        manager = self.create_download_manager()
         try:
-            print(f"Descargando archivo desde: {url}")
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'Referer': self.web_url
-            }
-            
-            response = requests.get(url, headers=headers, timeout=30, stream=True)
-            response.raise_for_status()
-            
-            # Determine file extension from URL or content type
-            content_type = response.headers.get('content-type', '').lower()
-            
-            if '.csv' in url.lower() or 'csv' in content_type:
-                extension = '.csv'
-            elif '.xlsx' in url.lower() or 'excel' in content_type or 'spreadsheet' in content_type:
-                extension = '.xlsx'
-            elif '.xls' in url.lower():
-                extension = '.xls'
-            else:
-                # Try to determine from content
-                if 'csv' in content_type or 'text/plain' in content_type:
-                    extension = '.csv'
-                elif 'excel' in content_type or 'spreadsheet' in content_type:
-                    extension = '.xlsx'
-                else:
-                    extension = '.csv'  # Default to CSV
+            candidate = manager.probe(url)
+            if not candidate:
+                print(f"Error descargando archivo: no se pudo acceder a {url}")
+                return False
+            return self.download_candidate(manager, candidate, dataset_title, index)
+        finally:
+            manager.close()
+    
+    def download_candidate(self, manager, candidate, dataset_title, index):
+        try:
+            print(f"Descargando archivo desde: {candidate.url}")
             
             safe_title = re.sub(r'[^\w\s-]', '', dataset_title).strip()
             safe_title = re.sub(r'[-\s]+', '-', safe_title)
-            filename = f"{safe_title}_web_{index+1}{extension}"
-            filepath = os.path.join(self.datasets_folder, filename)
-            
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            filepath = manager.download(candidate, f"{safe_title}_web_{index+1}")
             
-            print(f"Archivo descargado exitosamente: {filename}")
+            print(f"Archivo descargado exitosamente: {os.path.basename(filepath)}")
+            self.downloaded_files.append(filepath)
             return True
             
         except Exception as e:
             print(f"Error descargando archivo: {e}")
             return False
     
-    def check_download_folder(self):
-        try:
-            if os.path.exists(self.datasets_folder):
-                files = os.listdir(self.datasets_folder)
-                return len(files) > 0
-            return False
-        except Exception:
-            return False
-    
     def run(self):
         print("Iniciando spider de Selenium para portal de datos abiertos de Colombia...")
         print(f"API objetivo: {self.api_url}")
@@ -453,17 +768,20 @@ class ColombiaDataPortalSpider:
         print("Los datasets se guardarán en la carpeta: datasets/")
         print("-" * 60)
         
+        metrics_server = self.metrics.serve(self.metrics_port) if self.metrics_port else None
+        run_started = time.perf_counter()
         try:
             self.create_datasets_folder()
             
-            if not self.setup_driver():
-                print("Error: No se pudo configurar el driver de Chrome")
-                return False
-            
-            dataset_title = self.get_dataset_info_from_web()
+            # Title and metadata come from the metadata API; no browser needed yet
+            dataset_title = self.get_dataset_info_from_api()
             
             # Try API first, then web as fallback
-            if self.download_dataset_from_api(dataset_title):
+            if self.sync_mode:
+                downloaded = self.sync_dataset_from_api(dataset_title)
+            else:
+                downloaded = self.download_dataset_from_api(dataset_title)
+            if downloaded:
                 print(f"\n✅ Spider ejecutado exitosamente desde la API!")
                 print(f"Dataset: {dataset_title}")
                 print(f"Revisa la carpeta '{self.datasets_folder}' para ver los archivos descargados")
@@ -477,16 +795,46 @@ class ColombiaDataPortalSpider:
             return False
         
         finally:
-            if self.driver:
+            if self.readiness and self.readiness.timings:
+                print(f"Tiempos de espera: {self.readiness.summary()}")
+            self.release_driver()
+            self.metrics.observe("total", time.perf_counter() - run_started)
+            print(f"Tiempos por etapa: {self.metrics.summary()}")
+            if self.metrics_path:
+                self.metrics.write(self.metrics_path)
+                print(f"Métricas guardadas en {self.metrics_path}.json y {self.metrics_path}.prom")
+            if metrics_server:
+                metrics_server.shutdown()
+                metrics_server.server_close()
+    
+    def release_driver(self):
+        if self.pooled_browser:
+            self.browser_pool.release(self.pooled_browser)
+            self.pooled_browser = None
+            print("Driver de Chrome devuelto al pool")
+        elif self.driver:
+            try:
                 self.driver.quit()
                 print("Driver de Chrome cerrado")
+            except Exception as e:
+                # Called from finally blocks: must not hide the run's own result
+                print(f"Error cerrando el driver de Chrome: {e}")
+        self.driver = None
     
     def close(self):
-        if self.driver:
-            self.driver.quit()
+        self.release_driver()
+
+def create_browser_pool(size=2, max_uses=50, max_memory_mb=None, network_capture=False):
+    """Pool of pre-warmed headless Chrome sessions to share between spiders."""
+    spider = ColombiaDataPortalSpider()
+    spider.network_capture = network_capture
+    factory = spider.build_driver
+    return BrowserPool(factory, size=size, max_uses=max_uses, max_memory_mb=max_memory_mb)
 
 def main():
     spider = ColombiaDataPortalSpider()
+    spider.metrics_path = os.path.join(spider.datasets_folder, "metrics", spider.dataset_id)
+    spider.metrics.observe("module_import", IMPORT_SECONDS)
     try:
         success = spider.run()
         if success:
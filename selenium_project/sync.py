@@ -0,0 +1,119 @@
+import json
+import sqlite3
+import uuid
+from datetime import datetime, timedelta, timezone
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    id TEXT PRIMARY KEY,
+    updated_at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    seen_run TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rows_updated_at ON rows (updated_at, id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class DatasetMirror:
+    """Local SQLite copy of a SODA dataset, keyed by the portal's ``:id``.
+
+    Delta syncs upsert rows whose ``:updated_at`` is past the stored
+    high-water mark. The API does not report deleted rows, so every
+    ``full_sync_interval`` all rows are fetched again and rows the portal no
+    longer returns are removed.
+    """
+
+    def __init__(self, path, full_sync_interval=timedelta(days=7)):
+        self.path = path
+        self.full_sync_interval = full_sync_interval
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def get_state(self, key, default=None):
+        row = self.connection.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_state(self, key, value):
+        self.connection.execute("INSERT INTO sync_state (key, value) VALUES (?, ?) "
+                                "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    def needs_full_sync(self):
+        last_full_sync = self.get_state('last_full_sync')
+        if last_full_sync is None or self.high_water_mark() is None:
+            return True
+        elapsed = datetime.now(timezone.utc) - datetime.fromisoformat(last_full_sync)
+        return elapsed >= self.full_sync_interval
+
+    def high_water_mark(self):
+        """``(updated_at, id)`` of the most recently updated row, or None when empty."""
+        return self.connection.execute(
+            "SELECT updated_at, id FROM rows ORDER BY updated_at DESC, id DESC LIMIT 1").fetchone()
+
+    def upsert(self, rows, run_id, batch_size=5000):
+        count = 0
+        batch = []
+        statement = ("INSERT INTO rows (id, updated_at, data, seen_run) VALUES (?, ?, ?, ?) "
+                     "ON CONFLICT(id) DO UPDATE SET updated_at = excluded.updated_at, "
+                     "data = excluded.data, seen_run = excluded.seen_run")
+        for row in rows:
+            batch.append((row[':id'], row[':updated_at'],
+                          json.dumps(row, ensure_ascii=False, separators=(',', ':')), run_id))
+            if len(batch) >= batch_size:
+                with self.connection:
+                    self.connection.executemany(statement, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            with self.connection:
+                self.connection.executemany(statement, batch)
+            count += len(batch)
+        return count
+
+    def delete_unseen(self, run_id):
+        with self.connection:
+            return self.connection.execute("DELETE FROM rows WHERE seen_run != ?", (run_id,)).rowcount
+
+    def count(self):
+        return self.connection.execute("SELECT count(*) FROM rows").fetchone()[0]
+
+    def iter_rows(self):
+        # Same order as a full API download ($order=:id)
+        for (data,) in self.connection.execute("SELECT data FROM rows ORDER BY id"):
+            yield json.loads(data)
+
+    def sync(self, client, force_full=False):
+        """Bring the mirror up to date from ``client`` (a SodaClient); returns a summary dict."""
+        # Rows not stamped with this run's id after a full pass are gone from the portal
+        run_id = uuid.uuid4().hex
+        high_water_mark = self.high_water_mark()
+        full = force_full or self.needs_full_sync()
+
+        if full:
+            # Keyset paging: an offset pass would miss rows that shift while rows
+            # are deleted on the portal, and delete_unseen would then drop them
+            upserted = self.upsert(client.iter_all_rows(), run_id)
+            deleted = self.delete_unseen(run_id)
+        else:
+            upserted = self.upsert(client.iter_changed_rows(*high_water_mark), run_id)
+            deleted = 0
+
+        with self.connection:
+            if full:
+                self.set_state('last_full_sync', datetime.now(timezone.utc).isoformat())
+            self.set_state('last_sync', datetime.now(timezone.utc).isoformat())
+
+        new_mark = self.high_water_mark()
+        return {
+            'mode': 'full' if full else 'delta',
+            'upserted': upserted,
+            'deleted': deleted,
+            'rows': self.count(),
+            'high_water_mark': new_mark[0] if new_mark else None,
+        }
+
+    def close(self):
+        self.connection.close()